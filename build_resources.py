@@ -12,19 +12,249 @@ Changed history:
 """
 import os
 import sys
+import shutil
+import functools
+import importlib.util
+import hashlib
+import re
 import subprocess
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+RCC_CACHE_FILE = ".rcc_path"
+ICON_SUFFIXES = (".png", ".svg", ".ico")
+RCC_TIMEOUT = 60 # 秒
+# 查找QRC时跳过的目录（另外跳过所有隐藏目录和含 pyvenv.cfg 的虚拟环境）
+SKIP_DIRS = {"venv", "env", "build", "dist", "node_modules", "site-packages", "__pycache__"}
+# pyside6-rcc 和 Qt原生 rcc -g python 生成的模块导入PySide，需改为本程序使用的PyQt6
+_PYSIDE_IMPORT = re.compile(r"^(\s*)from PySide[26] import", re.MULTILINE)
+# 从GUI启动时避免在Windows上弹出控制台窗口
+_CREATION_FLAGS = subprocess.CREATE_NO_WINDOW if sys.platform == "win32" else 0
+
+def _qrc_inputs(qrc_path):
+    """解析QRC文件，列出其依赖的全部输入文件。
+
+    Args:
+        qrc_path (str): QRC文件路径。
+    Returns:
+        list[str]: 输入文件路径列表（包含QRC自身），路径相对于QRC所在目录解析。
+    """
+    base_dir = os.path.dirname(qrc_path)
+    root = ET.parse(qrc_path).getroot()
+    return [qrc_path] + [os.path.join(base_dir, f.text.strip()) for f in root.iter("file") if f.text]
+
+def _inputs_digest(paths, mtimes=None):
+    """根据输入文件的路径和修改时间计算摘要，用于判断是否需要重新编译。
+
+    Args:
+        paths (list[str]): 输入文件路径列表。
+        mtimes (dict[str, int], optional): 已知的 路径->st_mtime_ns 映射，命中时不再stat. Defaults to None.
+    Returns:
+        str: SHA-1十六进制摘要。
+    """
+    mtimes = mtimes or {}
+    key = hashlib.sha1()
+    for path in paths:
+        key.update(path.encode("utf-8"))
+        mtime = mtimes.get(os.path.normpath(path))
+        if mtime is None:
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError:
+                # 缺失的文件也计入摘要，确保其出现后会触发重新编译
+                key.update(b"missing")
+                continue
+        key.update(str(mtime).encode())
+    return key.hexdigest()
+
+def _scan_icons(icons_dir="icons"):
+    """扫描图标目录，返回图标文件的 路径->st_mtime_ns 映射。
+
+    os.scandir 返回的DirEntry会缓存stat信息，摘要计算可直接复用。
+
+    Args:
+        icons_dir (str, optional): 图标目录. Defaults to "icons".
+    Returns:
+        dict[str, int]: 图标文件路径到修改时间（纳秒）的映射。
+    """
+    with os.scandir(icons_dir) as it:
+        return {os.path.normpath(e.path): e.stat().st_mtime_ns
+                for e in it if e.name.endswith(ICON_SUFFIXES) and e.is_file()}
+
+def _stamp_path(out_path):
+    """返回输出文件对应的摘要记录路径，如 resources.py -> .resources.stamp。"""
+    out_dir, out_name = os.path.split(out_path)
+    return os.path.join(out_dir, f".{os.path.splitext(out_name)[0]}.stamp")
+
+def _read_stamp(stamp_path):
+    """读取上次成功编译时记录的摘要，不存在时返回None。"""
+    try:
+        with open(stamp_path, "r", encoding="utf-8") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+def _write_stamp(digest, stamp_path):
+    """记录本次成功编译的输入摘要。"""
+    with open(stamp_path, "w", encoding="utf-8") as f:
+        f.write(digest)
+
+def _is_skipped_dir(path, name):
+    """判断查找QRC时是否跳过该目录：隐藏目录、虚拟环境和构建输出目录。"""
+    return (name.startswith(".") or name in SKIP_DIRS
+            or os.path.exists(os.path.join(path, "pyvenv.cfg")))
+
+def _find_qrc_pairs():
+    """查找当前项目中的QRC文件，生成 (输入, 输出) 路径对。
+
+    不进入隐藏目录、虚拟环境和构建目录，避免编译第三方包中的QRC并向其中写入文件。
+    输出文件与QRC同名同目录，扩展名为.py。
+
+    Returns:
+        list[tuple[str, str]]: (qrc路径, py路径) 列表。
+    """
+    qrc_files = []
+    for root, dirs, files in os.walk("."):
+        dirs[:] = [d for d in dirs if not _is_skipped_dir(os.path.join(root, d), d)]
+        qrc_files.extend(os.path.normpath(os.path.join(root, f)) for f in files if f.endswith(".qrc"))
+    return [(qrc, os.path.splitext(qrc)[0] + ".py") for qrc in sorted(qrc_files)]
+
+def _rcc_candidates(pyqt_path):
+    """按优先级列出可能的rcc工具位置。"""
+    # 在Windows上，rcc随PyQt6一起安装
+    if sys.platform == "win32":
+        return [os.path.join(pyqt_path, "rcc.exe"),
+                os.path.join(pyqt_path, "Qt6", "bin", "rcc.exe")]
+    # 在Unix/Mac上，从PATH中查找命令行工具
+    return [shutil.which(name) for name in ("pyrcc6", "pyside6-rcc", "rcc")]
+
+@functools.lru_cache(maxsize=1)
+def _find_rcc(pyqt_path):
+    """确定rcc工具路径，结果缓存在 .rcc_path 中供后续运行复用。
+
+    Args:
+        pyqt_path (str): PyQt6安装目录。
+    Returns:
+        str | None: rcc可执行文件路径，找不到时返回None。
+    """
+    cached = _read_stamp(RCC_CACHE_FILE)
+    if cached and os.path.exists(cached):
+        return cached
+    for candidate in _rcc_candidates(pyqt_path):
+        if candidate and os.path.exists(candidate):
+            _write_stamp(candidate, RCC_CACHE_FILE)
+            return candidate
+    return None
+
+def _rcc_command(rcc_path, qrc_path, out_path):
+    """构造rcc命令行。Qt原生rcc默认生成C++代码，需要显式指定Python生成器。"""
+    cmd = [rcc_path, qrc_path, "-o", out_path]
+    if os.path.splitext(os.path.basename(rcc_path))[0] == "rcc":
+        cmd[1:1] = ["-g", "python"]
+    return cmd
+
+def _use_pyqt6(path):
+    """将生成模块中的PySide导入改为PyQt6，否则资源模块无法在本程序中导入。
+
+    Args:
+        path (str): rcc生成的Python模块路径。
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        source = f.read()
+    fixed = _PYSIDE_IMPORT.sub(r"\1from PyQt6 import", source)
+    if fixed != source:
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(fixed)
+
+def _compile_one(job):
+    """在工作进程中编译单个QRC文件。
+
+    Args:
+        job (tuple[str, str, str, str]): (工作目录, rcc路径, qrc路径, py路径)。
+    """
+    cwd, rcc_path, qrc_path, out_path = job
+    # 工作进程不一定继承父进程切换后的目录，显式切换
+    os.chdir(cwd)
+    # 先输出到临时文件再原子替换，编译中断不会留下半截模块
+    tmp_path = out_path + ".tmp"
+    try:
+        subprocess.run(_rcc_command(rcc_path, qrc_path, tmp_path), check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                       timeout=RCC_TIMEOUT, creationflags=_CREATION_FLAGS)
+        _use_pyqt6(tmp_path)
+        os.replace(tmp_path, out_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+def compile_all(pairs, rcc_path, mtimes=None):
+    """编译多个QRC文件，仅处理输入已变化的文件。
+
+    rcc工具只解析一次，供所有输入复用。存在多个过期文件时使用进程池并行编译，
+    单个文件失败不影响其余文件。
+
+    Args:
+        pairs (list[tuple[str, str]]): (qrc路径, py路径) 列表。
+        rcc_path (str): rcc工具路径。
+        mtimes (dict[str, int], optional): 已扫描文件的修改时间，用于摘要计算. Defaults to None.
+    Returns:
+        list[tuple[str, Exception]]: 编译失败的输出路径及其异常。
+    """
+    failures = []
+    stale = []
+    for qrc_path, out_path in pairs:
+        try:
+            digest = _inputs_digest(_qrc_inputs(qrc_path), mtimes)
+        except Exception as e:
+            failures.append((out_path, e))
+            continue
+        if os.path.exists(out_path) and _read_stamp(_stamp_path(out_path)) == digest:
+            print(f"资源文件已是最新，跳过编译: {out_path}")
+        else:
+            stale.append((qrc_path, out_path, digest))
+
+    cwd = os.getcwd()
+    jobs = [(cwd, rcc_path, qrc_path, out_path) for qrc_path, out_path, _ in stale]
+    if len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(len(jobs), os.cpu_count() or 1)) as ex:
+            futures = [ex.submit(_compile_one, job) for job in jobs]
+            results = [f.exception() for f in futures]
+    else:
+        # 单个文件无需启动进程池
+        results = []
+        for job in jobs:
+            try:
+                _compile_one(job)
+                results.append(None)
+            except Exception as e:
+                results.append(e)
+
+    for (qrc_path, out_path, digest), error in zip(stale, results):
+        if error is not None:
+            failures.append((out_path, error))
+            continue
+        _write_stamp(digest, _stamp_path(out_path))
+        print(f"成功编译资源文件: {out_path}")
+    return failures
+
+def _write_placeholder(out_path):
+    """原子地写入空的资源模块作为后备。"""
+    tmp_path = out_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("# 空的资源模块\n")
+    os.replace(tmp_path, out_path)
 
 def main():
     """主入口，检查依赖并编译资源文件
 
-    检查PyQt6和icons目录，自动调用rcc工具生成resources.py。
+    检查PyQt6和icons目录，自动调用rcc工具将所有QRC编译为Python模块。
     """
-    # 检查是否安装了PyQt6
-    try:
-        import PyQt6
-    except ImportError:
+    # 检查是否安装了PyQt6（只查找模块位置，不加载Qt绑定）
+    spec = importlib.util.find_spec("PyQt6")
+    if spec is None:
         print("错误: 请先安装PyQt6")
         return
+    pyqt_path = spec.submodule_search_locations[0]
 
     # 检查icons目录是否存在，如果不存在则创建
     if not os.path.exists("icons"):
@@ -34,44 +264,37 @@ def main():
         return
 
     # 检查是否有图标文件
-    icon_files = [f for f in os.listdir("icons") if f.endswith(".png")]
-    if not icon_files:
-        print("错误: icons 目录中没有找到PNG图标文件")
+    icon_mtimes = _scan_icons()
+    if not icon_mtimes:
+        print("错误: icons 目录中没有找到图标文件")
         print("请将图标文件放入 icons 目录，然后重新运行此脚本")
         return
 
     # 检查资源文件是否存在
-    if not os.path.exists("resources.qrc"):
-        print("错误: 没有找到 resources.qrc 文件")
+    pairs = _find_qrc_pairs()
+    if not pairs:
+        print("错误: 没有找到 .qrc 资源文件")
         return
 
     # 使用PyQt的资源编译器编译资源文件
-    try:
-        # 获取PyQt6安装路径
-        pyqt_path = os.path.dirname(PyQt6.__file__)
-        
-        # 在Windows上，我们使用pyrcc6.exe
-        if sys.platform == "win32":
-            rcc_path = os.path.join(pyqt_path, "rcc.exe")
-            if not os.path.exists(rcc_path):
-                rcc_path = os.path.join(pyqt_path, "Qt6", "bin", "rcc.exe")
-        else:
-            # 在Unix/Mac上，我们尝试使用命令行工具pyrcc6
-            rcc_path = "pyrcc6"
-        
-        # 执行编译命令
-        cmd = [rcc_path, "resources.qrc", "-o", "resources.py"]
-        subprocess.run(cmd, check=True)
-        print("成功编译资源文件: resources.py")
-    except Exception as e:
-        print(f"错误: 无法编译资源文件: {e}")
+    rcc_path = _find_rcc(pyqt_path)
+    if rcc_path is None:
+        print("错误: 找不到rcc工具")
         print("提示: 请确保PyQt6已正确安装，并且rcc工具可用")
-        print("替代方案: 如果无法编译资源，请创建一个空的resources.py文件")
-        
-        # 创建一个空的资源模块作为后备
-        with open("resources.py", "w") as f:
-            f.write("# 空的资源模块\n")
-        print("已创建空的resources.py")
+        return
+    failures = compile_all(pairs, rcc_path, icon_mtimes)
+    for out_path, e in failures:
+        print(f"错误: 无法编译资源文件 {out_path}: {e}")
+        if isinstance(e, subprocess.CalledProcessError) and e.stderr:
+            print(e.stderr.decode(errors="replace"))
+        print("提示: 请确保PyQt6已正确安装，并且rcc工具可用")
+
+        # 保留之前成功编译的产物，仅在完全没有资源模块时创建空的后备模块
+        if os.path.exists(out_path):
+            print(f"保留现有的{out_path}")
+            continue
+        _write_placeholder(out_path)
+        print(f"已创建空的{out_path}")
 
 if __name__ == "__main__":
     # 保存当前工作目录
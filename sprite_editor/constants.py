@@ -10,12 +10,17 @@ Changed history:
                             2025/04/15: 从sprite_mask_editor.py拆分为独立模块;
 ----
 """
+from typing import Final
 
 # 应用信息
-APP_NAME = "SpriteMaskEditor"
-APP_VERSION = "1.0.0"
+APP_NAME: Final[str] = "SpriteMaskEditor"
+APP_VERSION: Final[str] = "1.0.0"
 
 # 默认值
-DEFAULT_BRUSH_SIZE = 12
-DEFAULT_MASK_COLOR = "#4f8cff"
-DEFAULT_FRAME_SIZE = 128
+DEFAULT_BRUSH_SIZE: Final[int] = 12
+DEFAULT_MASK_COLOR: Final[str] = "#4f8cff"
+DEFAULT_FRAME_SIZE: Final[int] = 128
+DEFAULT_PNG_COMPRESS_LEVEL: Final[int] = 3 # 导出PNG的zlib压缩级别 (0-9)
+
+# 交互预览
+PROXY_MAX_WIDTH: Final[int] = 1024 # 拖动阈值滑块时用于生成蒙版的代理图最大宽度
@@ -10,6 +10,9 @@ Changed history:
                             2025/04/15: 从sprite_mask_editor.py拆分为独立模块;
 ----
 """
+import os
+import time
+import collections
 import numpy as np
 import cv2
 from PyQt6 import QtWidgets, QtGui, QtCore
@@ -17,25 +20,37 @@ from PyQt6.QtCore import Qt, QTimer
 from PyQt6.QtGui import QIcon, QPixmap, QShortcut, QKeySequence, QAction
 import logging
 
-from PIL import Image, ImageQt
-
 from .roi import FrameROI
-from .widgets import MaskEditWidget
+from .widgets import MaskEditWidget, FramePreview, TaskWorker, to_gray, ndarray_to_qimage, cached_icon
 from .constants import DEFAULT_BRUSH_SIZE
 
+# 超过此边长的图像在 Canny 后处理中使用近似闭运算
+APPROX_MORPH_MIN_SIDE = 1024
+APPROX_MORPH_SCALE = 2
+
 # --- Parameter Dialogs Start ---
 class MorphologyParamsDialog(QtWidgets.QDialog):
     """用于设置形态学操作参数的对话框。"""
+
     def __init__(self, parent=None, 
                  default_open_k=3, default_open_iter=1, 
-                 default_close_k=3, default_close_iter=2):
+                 default_close_k=3, default_close_iter=2, leading_groups=()):
+        """初始化MorphologyParamsDialog。
+
+        Args:
+            leading_groups (Iterable[QtWidgets.QGroupBox], optional): 排在形态学参数之前的分组，
+                供子类在布局构建时直接加入，避免事后插入行. Defaults to ().
+        """
         super().__init__(parent)
         self.setWindowTitle("形态学参数")
         layout = QtWidgets.QFormLayout(self)
+        for group in leading_groups:
+            layout.addRow(group)
 
         # Open Operation
         open_group = QtWidgets.QGroupBox("开运算 (去噪点)")
         open_group.setObjectName("openGroup")
+        self.open_group = open_group
         open_layout = QtWidgets.QFormLayout(open_group)
         self.open_kernel_spin = QtWidgets.QSpinBox()
         self.open_kernel_spin.setRange(1, 15) # Kernel size (odd numbers often preferred)
@@ -53,6 +68,7 @@ class MorphologyParamsDialog(QtWidgets.QDialog):
         # Close Operation
         close_group = QtWidgets.QGroupBox("闭运算 (填洞)")
         close_group.setObjectName("closeGroup")
+        self.close_group = close_group
         close_layout = QtWidgets.QFormLayout(close_group)
         self.close_kernel_spin = QtWidgets.QSpinBox()
         self.close_kernel_spin.setRange(1, 15)
@@ -90,42 +106,37 @@ class CannyParamsDialog(MorphologyParamsDialog):
     def __init__(self, parent=None, default_thresh1=50, default_thresh2=150,
                  default_dilate_k=3, default_dilate_iter=1,
                  default_close_k=3, default_close_iter=3): # Inherits morphology params
-        # Initialize morphology part first (using different defaults for Canny post-processing)
+        # Canny Thresholds Group（先构建，随形态学参数一起按顺序加入布局）
+        canny_group = QtWidgets.QGroupBox("Canny 阈值")
+        canny_group.setToolTip("Canny 边缘检测算法的核心阈值。")
+        canny_layout = QtWidgets.QFormLayout(canny_group)
+        thresh1_spin = QtWidgets.QSpinBox()
+        thresh1_spin.setRange(0, 500)
+        thresh1_spin.setValue(default_thresh1)
+        thresh1_spin.setToolTip("低阈值：低于此值的边会被抑制。")
+        thresh2_spin = QtWidgets.QSpinBox()
+        thresh2_spin.setRange(0, 1000)
+        thresh2_spin.setValue(default_thresh2)
+        thresh2_spin.setToolTip("高阈值：高于此值的边被视为强边缘。介于两者之间的边，只有连接到强边缘才保留。")
+        canny_layout.addRow("低阈值 (Threshold1):", thresh1_spin)
+        canny_layout.addRow("高阈值 (Threshold2):", thresh2_spin)
+
+        # Initialize morphology part (using different defaults for Canny post-processing)
         super().__init__(parent, 
                          default_open_k=default_dilate_k, # Reuse open_k for dilate_k UI
                          default_open_iter=default_dilate_iter, # Reuse open_iter for dilate_iter UI
                          default_close_k=default_close_k, 
-                         default_close_iter=default_close_iter)
+                         default_close_iter=default_close_iter,
+                         leading_groups=(canny_group,))
         self.setWindowTitle("Canny 边缘检测参数")
+        self.thresh1_spin = thresh1_spin
+        self.thresh2_spin = thresh2_spin
 
-        # Rename morphology groups for clarity in Canny context - Use objectName
-        open_group_widget = self.findChild(QtWidgets.QGroupBox, "openGroup")
-        if open_group_widget:
-            open_group_widget.setTitle("边缘膨胀 (连接断线)")
-            open_group_widget.setToolTip("对检测到的边缘进行膨胀，尝试连接断开的线条。")
-        close_group_widget = self.findChild(QtWidgets.QGroupBox, "closeGroup")
-        if close_group_widget:
-            close_group_widget.setTitle("轮廓闭合 (填充内部)")
-            close_group_widget.setToolTip("对膨胀后的轮廓进行闭运算，尝试填充内部的小孔洞，形成完整区域。")
-
-        # Canny Thresholds Group
-        canny_group = QtWidgets.QGroupBox("Canny 阈值")
-        canny_group.setToolTip("Canny 边缘检测算法的核心阈值。")
-        canny_layout = QtWidgets.QFormLayout(canny_group)
-        self.thresh1_spin = QtWidgets.QSpinBox()
-        self.thresh1_spin.setRange(0, 500)
-        self.thresh1_spin.setValue(default_thresh1)
-        self.thresh1_spin.setToolTip("低阈值：低于此值的边会被抑制。")
-        self.thresh2_spin = QtWidgets.QSpinBox()
-        self.thresh2_spin.setRange(0, 1000)
-        self.thresh2_spin.setValue(default_thresh2)
-        self.thresh2_spin.setToolTip("高阈值：高于此值的边被视为强边缘。介于两者之间的边，只有连接到强边缘才保留。")
-        canny_layout.addRow("低阈值 (Threshold1):", self.thresh1_spin)
-        canny_layout.addRow("高阈值 (Threshold2):", self.thresh2_spin)
-
-        # Insert Canny group before morphology groups in the main layout
-        main_layout = self.layout()
-        main_layout.insertRow(0, canny_group)
+        # Rename morphology groups for clarity in Canny context
+        self.open_group.setTitle("边缘膨胀 (连接断线)")
+        self.open_group.setToolTip("对检测到的边缘进行膨胀，尝试连接断开的线条。")
+        self.close_group.setTitle("轮廓闭合 (填充内部)")
+        self.close_group.setToolTip("对膨胀后的轮廓进行闭运算，尝试填充内部的小孔洞，形成完整区域。")
 
     def get_params(self):
         """获取Canny和形态学参数。"""
@@ -163,6 +174,7 @@ class AdaptiveThresholdParamsDialog(QtWidgets.QDialog):
         self.block_size_spin = QtWidgets.QSpinBox()
         self.block_size_spin.setRange(3, 255) # Block size must be odd
         self.block_size_spin.setSingleStep(2)
+        self.block_size_spin.valueChanged.connect(self._ensure_odd_block_size)
         self.block_size_spin.setValue(default_block_size)
         self.block_size_spin.setToolTip("计算阈值的像素邻域大小，必须是奇数。")
         layout.addRow("块大小 (奇数):", self.block_size_spin)
@@ -183,21 +195,91 @@ class AdaptiveThresholdParamsDialog(QtWidgets.QDialog):
         buttons.rejected.connect(self.reject)
         layout.addRow(buttons)
 
+    def _ensure_odd_block_size(self, value):
+        """输入偶数块大小时立即调整为相邻的奇数。"""
+        if value % 2 == 0:
+            self.block_size_spin.setValue(value | 1)
+
     def get_params(self):
         """获取用户设置的参数。"""
-        block_size = self.block_size_spin.value()
-        # Ensure block size is odd
-        if block_size % 2 == 0:
-            block_size += 1 
-            logging.warning(f"Block size was even, adjusted to {block_size}")
-            
         return {
             'adaptive_method': self.method_combo.currentData(),
-            'block_size': block_size,
+            'block_size': self.block_size_spin.value(),
             'C': self.c_spin.value()
         }
 # --- Adaptive Threshold Dialog End ---
 
+# 蒙版编辑器帮助内容（富文本）
+_HELP_HTML = (
+    "<b>蒙版编辑器 - 帮助</b><br><br>"
+
+    "<b>核心交互:</b><br>"
+    "- <b>绘制/擦除/标记:</b> 在编辑区域按住鼠标左键拖动。<br>"
+    "- <b>平移视图:</b> 按住 Shift 键并拖动鼠标左键。<br>"
+    "- <b>缩放视图:</b> 使用鼠标滚轮。<br><br>"
+
+    "<b>主要模式 (通过工具栏按钮切换):</b><br>"
+    "- <b>绘制 [B]:</b> 添加蒙版区域 (前景)。<br>"
+    "- <b>擦除 [E]:</b> 移除蒙版区域 (背景)。<br>"
+    "- <b>GrabCut (自动蒙版菜单):</b> 通过框选和标记进行交互式分割。<br>"
+    "- <b>Watershed (自动蒙版菜单):</b> 通过标记前景/背景进行分割。<br><br>"
+
+    "<b>工具栏按钮 (部分):</b><br>"
+    "- <b>撤销/重做 [Ctrl+Z/Y]:</b> 撤销或重做编辑步骤。<br>"
+    "- <b>重置 [R]:</b> 恢复到初始蒙版状态。<br>"
+    "- <b>自动修复 [A]:</b> 使用形态学优化蒙版。<br>"
+    "- <b>自动蒙版 [D]:</b> 提供多种自动分割算法入口。<br>"
+    "- <b>重置视图 [Home]:</b> 恢复默认缩放和平移。<br>"
+    "- <b>笔刷大小 [ \[ / \] ]:</b> 调整工具大小。<br><br>"
+
+    "<b>键盘快捷键:</b><br>"
+    "<table>"
+    "<tr><td>B</td><td>切换到绘制模式</td></tr>"
+    "<tr><td>E</td><td>切换到擦除模式</td></tr>"
+    "<tr><td>[</td><td>减小笔刷大小</td></tr>"
+    "<tr><td>]</td><td>增大笔刷大小</td></tr>"
+    "<tr><td>Ctrl+Z</td><td>撤销</td></tr>"
+    "<tr><td>Ctrl+Y</td><td>重做</td></tr>"
+    "<tr><td>R</td><td>重置蒙版</td></tr>"
+    "<tr><td>A</td><td>自动修复蒙版</td></tr>"
+    "<tr><td>D</td><td>打开自动蒙版菜单</td></tr>"
+    "<tr><td>Home</td><td>重置视图</td></tr>"
+    "<tr><td>Ctrl+S</td><td>保存并关闭</td></tr>"
+    "<tr><td>Esc</td><td>取消并关闭</td></tr>"
+    "</table><br>"
+
+    "<i>提示: 更详细的功能说明请查看项目 `tools/README.md` 文件。</i>"
+)
+
+# 标记按钮组中按钮ID对应的标记模式
+_MARKER_MODES = ('fg', 'bg')
+
+# MaskEditDialog 工具栏按钮规格: (属性名, 文本, 图标, 提示[, 可选中])
+_MODE_TOOLS = [
+    ("btn_draw", "绘制", "draw.png", "绘制蒙版 [B]", True),
+    ("btn_erase", "擦除", "erase.png", "擦除蒙版 [E]", True),
+]
+_GRABCUT_TOOLS = [
+    ("btn_gc_fg", "前景标记", "fg_marker.png", "标记确定为前景的区域", True),
+    ("btn_gc_bg", "背景标记", "bg_marker.png", "标记确定为背景的区域", True),
+    ("btn_gc_finish", "完成分割", "check.png", "完成 GrabCut 分割并应用蒙版"),
+]
+_WATERSHED_TOOLS = [
+    ("btn_ws_fg", "前景标记", "ws_fg.png", "标记确定前景", True),
+    ("btn_ws_bg", "背景标记", "ws_bg.png", "标记确定背景", True),
+    ("btn_ws_run", "执行分割", "run.png", "基于标记执行分水岭分割"),
+]
+_HISTORY_TOOLS = [
+    ("btn_undo", "撤销", "undo.png", "撤销上一步 [Ctrl+Z]"),
+    ("btn_redo", "重做", "redo.png", "重做下一步 [Ctrl+Y]"),
+]
+_EDIT_TOOLS = [
+    ("btn_reset", "重置", "trash.png", "重置蒙版 [R]"),
+    ("btn_auto_fix", "自动修复", "auto.png", "自动修复蒙版（参数可调）[A]"),
+    ("btn_auto_mask", "自动蒙版", "magic.png", "使用算法自动生成蒙版 [D]"),
+    ("btn_reset_view", "重置视图", "fit.png", "重置缩放和平移 [Home]"),
+]
+
 class MaskEditDialog(QtWidgets.QDialog):
     """蒙版编辑对话框，用于编辑ROI的蒙版。
 
@@ -214,6 +296,8 @@ class MaskEditDialog(QtWidgets.QDialog):
         """
         super().__init__(parent)
         self.setWindowTitle("蒙版编辑")
+        # 形态学/Canny等OpenCV滤波使用多线程，留出一个核心给GUI线程
+        cv2.setNumThreads(max(1, (os.cpu_count() or 2) - 1))
         self.setWindowFlag(Qt.WindowType.WindowContextHelpButtonHint, False)
         self.setMinimumSize(600, 500)
 
@@ -222,12 +306,26 @@ class MaskEditDialog(QtWidgets.QDialog):
         self.original_mask = mask
 
         # 确保掩码尺寸与图像一致
-        if self.original_mask.shape[:2] != self.original_img.shape[:2]:
-            self.original_mask = cv2.resize(
-                self.original_mask, 
-                (self.original_img.shape[1], self.original_img.shape[0]), 
-                interpolation=cv2.INTER_NEAREST
-            )
+        h, w = self.original_img.shape[:2]
+        mh, mw = self.original_mask.shape[:2]
+        if (mh, mw) != (h, w):
+            if abs(mh - h) <= 1 and abs(mw - w) <= 1:
+                # ROI取整造成的1像素误差：裁剪多余的行列，缺少的行列复制边缘
+                cropped = self.original_mask[:h, :w]
+                pad = ((0, h - cropped.shape[0]), (0, w - cropped.shape[1]))
+                self.original_mask = np.ascontiguousarray(
+                    np.pad(cropped, pad, mode='edge') if any(p[1] for p in pad) else cropped)
+            else:
+                # 直接写入按目标尺寸分配的缓冲区
+                resized = np.empty((h, w), dtype=self.original_mask.dtype)
+                cv2.resize(self.original_mask, (w, h), dst=resized,
+                           interpolation=cv2.INTER_NEAREST)
+                self.original_mask = resized
+
+        # 缓存灰度图，Canny/自适应阈值每次运行时直接复用
+        self._gray = to_gray(self.original_img)
+        # 有可用的OpenCL设备时上传一份UMat，Canny/自适应阈值经T-API在GPU上执行
+        self._gray_umat = cv2.UMat(self._gray) if cv2.ocl.haveOpenCL() and cv2.ocl.useOpenCL() else None
 
         # 创建UI
         self.init_ui()
@@ -235,6 +333,70 @@ class MaskEditDialog(QtWidgets.QDialog):
         # 设置键盘快捷键
         self.setup_shortcuts()
 
+        # 参数对话框首次使用时创建，之后复用并保留上次的参数
+        self._morph_dlg = None
+        self._canny_dlg = None
+        self._adaptive_dlg = None
+
+        # 分割流程的操作提示，创建一次后反复使用
+        self._gc_prompt = self._make_prompt(
+            "GrabCut 分割", "请在图像上拖动鼠标，绘制一个紧密包围主要前景对象的矩形框。")
+        self._ws_prompt = self._make_prompt(
+            "分水岭 分割", "请使用前景(蓝)/背景(红)画笔标记图像区域，然后点击\"执行分割\"。")
+
+    def _make_prompt(self, title, text):
+        """创建可复用的信息提示框。
+
+        Args:
+            title (str): 窗口标题。
+            text (str): 提示内容。
+        Returns:
+            QtWidgets.QMessageBox: 提示框实例。
+        """
+        box = QtWidgets.QMessageBox(self)
+        box.setIcon(QtWidgets.QMessageBox.Icon.Information)
+        box.setWindowTitle(title)
+        box.setText(text)
+        box.setStandardButtons(QtWidgets.QMessageBox.StandardButton.Ok)
+        return box
+
+    def _make_marker_group(self, fg_btn, bg_btn):
+        """创建前景/背景标记按钮的互斥组。
+
+        按钮ID为其在 _MARKER_MODES 中的索引，idClicked 信号可直接映射到标记模式。
+
+        Args:
+            fg_btn (QtWidgets.QToolButton): 前景标记按钮。
+            bg_btn (QtWidgets.QToolButton): 背景标记按钮。
+        Returns:
+            QtWidgets.QButtonGroup: 互斥按钮组。
+        """
+        group = QtWidgets.QButtonGroup(self)
+        group.setExclusive(True)
+        for marker_id, btn in enumerate((fg_btn, bg_btn)):
+            group.addButton(btn, marker_id)
+        return group
+
+    def _make_tool(self, attr, text, icon, tip, checkable=False):
+        """按规格创建工具按钮并保存为实例属性。
+
+        Args:
+            attr (str): 实例属性名，如 "btn_draw"。
+            text (str): 按钮文本。
+            icon (str): icons目录下的图标文件名。
+            tip (str): 悬浮提示。
+            checkable (bool, optional): 是否可选中. Defaults to False.
+        Returns:
+            QtWidgets.QToolButton: 创建的按钮。
+        """
+        btn = QtWidgets.QToolButton()
+        btn.setText(text)
+        btn.setIcon(cached_icon(f":/icons/{icon}"))
+        btn.setToolTip(tip)
+        btn.setCheckable(checkable)
+        setattr(self, attr, btn)
+        return btn
+
     def init_ui(self):
         """初始化界面布局和控件。"""
         layout = QtWidgets.QVBoxLayout()
@@ -244,20 +406,9 @@ class MaskEditDialog(QtWidgets.QDialog):
         self.toolbar.setIconSize(QtCore.QSize(24, 24))
         
         # 工具按钮
-        self.btn_draw = QtWidgets.QToolButton()
-        self.btn_draw.setText("绘制")
-        self.btn_draw.setIcon(QIcon(":/icons/draw.png"))
-        self.btn_draw.setToolTip("绘制蒙版 [B]")
-        self.btn_draw.setCheckable(True)
+        for spec in _MODE_TOOLS:
+            self.toolbar.addWidget(self._make_tool(*spec))
         self.btn_draw.setChecked(True)
-        self.toolbar.addWidget(self.btn_draw)
-        
-        self.btn_erase = QtWidgets.QToolButton()
-        self.btn_erase.setText("擦除")
-        self.btn_erase.setIcon(QIcon(":/icons/erase.png"))
-        self.btn_erase.setToolTip("擦除蒙版 [E]")
-        self.btn_erase.setCheckable(True)
-        self.toolbar.addWidget(self.btn_erase)
         
         # --- Separator 1 ---        
         sep1_action = self.toolbar.addSeparator()
@@ -267,31 +418,10 @@ class MaskEditDialog(QtWidgets.QDialog):
         gc_layout = QtWidgets.QHBoxLayout(self.gc_tools_frame)
         gc_layout.setContentsMargins(5, 0, 5, 0)
         gc_layout.setSpacing(5)
+        for spec in _GRABCUT_TOOLS:
+            gc_layout.addWidget(self._make_tool(*spec))
 
-        self.btn_gc_fg = QtWidgets.QToolButton()
-        self.btn_gc_fg.setText("前景标记")
-        self.btn_gc_fg.setIcon(QIcon(":/icons/fg_marker.png"))
-        self.btn_gc_fg.setToolTip("标记确定为前景的区域")
-        self.btn_gc_fg.setCheckable(True)
-        gc_layout.addWidget(self.btn_gc_fg)
-
-        self.btn_gc_bg = QtWidgets.QToolButton()
-        self.btn_gc_bg.setText("背景标记")
-        self.btn_gc_bg.setIcon(QIcon(":/icons/bg_marker.png"))
-        self.btn_gc_bg.setToolTip("标记确定为背景的区域")
-        self.btn_gc_bg.setCheckable(True)
-        gc_layout.addWidget(self.btn_gc_bg)
-
-        self.gc_marker_group = QtWidgets.QButtonGroup(self)
-        self.gc_marker_group.addButton(self.btn_gc_fg)
-        self.gc_marker_group.addButton(self.btn_gc_bg)
-        self.gc_marker_group.setExclusive(True)
-
-        self.btn_gc_finish = QtWidgets.QToolButton()
-        self.btn_gc_finish.setText("完成分割")
-        self.btn_gc_finish.setIcon(QIcon(":/icons/check.png"))
-        self.btn_gc_finish.setToolTip("完成 GrabCut 分割并应用蒙版")
-        gc_layout.addWidget(self.btn_gc_finish)
+        self.gc_marker_group = self._make_marker_group(self.btn_gc_fg, self.btn_gc_bg)
 
         self.gc_tools_frame.setVisible(False)
         self.toolbar.insertWidget(sep1_action, self.gc_tools_frame)
@@ -307,111 +437,42 @@ class MaskEditDialog(QtWidgets.QDialog):
         self.ws_layout = QtWidgets.QHBoxLayout(self.ws_tools_frame)
         self.ws_layout.setContentsMargins(5, 0, 5, 0)
         self.ws_layout.setSpacing(5)
+        for spec in _WATERSHED_TOOLS:
+            btn = self._make_tool(*spec)
+            btn.setVisible(False)  # 初始隐藏
+            self.ws_layout.addWidget(btn)
 
-        self.btn_ws_fg = QtWidgets.QToolButton()
-        self.btn_ws_fg.setText("前景标记")
-        self.btn_ws_fg.setIcon(QIcon(":/icons/ws_fg.png"))
-        self.btn_ws_fg.setToolTip("标记确定前景")
-        self.btn_ws_fg.setCheckable(True)
-        self.btn_ws_fg.setVisible(False)  # 初始隐藏
-        self.ws_layout.addWidget(self.btn_ws_fg)
-
-        self.btn_ws_bg = QtWidgets.QToolButton()
-        self.btn_ws_bg.setText("背景标记")
-        self.btn_ws_bg.setIcon(QIcon(":/icons/ws_bg.png"))
-        self.btn_ws_bg.setToolTip("标记确定背景")
-        self.btn_ws_bg.setCheckable(True)
-        self.btn_ws_bg.setVisible(False)  # 初始隐藏
-        self.ws_layout.addWidget(self.btn_ws_bg)
-
-        self.ws_marker_group = QtWidgets.QButtonGroup(self)
-        self.ws_marker_group.addButton(self.btn_ws_fg)
-        self.ws_marker_group.addButton(self.btn_ws_bg)
-        self.ws_marker_group.setExclusive(True)
-
-        self.btn_ws_run = QtWidgets.QToolButton()
-        self.btn_ws_run.setText("执行分割")
-        self.btn_ws_run.setIcon(QIcon(":/icons/run.png"))
-        self.btn_ws_run.setToolTip("基于标记执行分水岭分割")
-        self.btn_ws_run.setVisible(False)  # 初始隐藏
-        self.ws_layout.addWidget(self.btn_ws_run)
+        self.ws_marker_group = self._make_marker_group(self.btn_ws_fg, self.btn_ws_bg)
 
         self.toolbar.insertWidget(sep1_action, self.ws_tools_frame)
         # --- End Watershed Tools Frame ---
         
-        # Separator before standard buttons - REMOVED (sep1_action already added)
-        # toolbar.addSeparator()
-        
         # Undo/Redo buttons (Added AFTER sep1_action implicitly)
-        self.btn_undo = QtWidgets.QToolButton()
-        self.btn_undo.setText("撤销")
-        self.btn_undo.setIcon(QIcon(":/icons/undo.png"))
-        self.btn_undo.setToolTip("撤销上一步 [Ctrl+Z]")
-        self.toolbar.addWidget(self.btn_undo)
-        
-        self.btn_redo = QtWidgets.QToolButton()
-        self.btn_redo.setText("重做")
-        self.btn_redo.setIcon(QIcon(":/icons/redo.png"))
-        self.btn_redo.setToolTip("重做下一步 [Ctrl+Y]")
-        self.toolbar.addWidget(self.btn_redo)
+        for spec in _HISTORY_TOOLS:
+            self.toolbar.addWidget(self._make_tool(*spec))
         
         self.toolbar.addSeparator() # Separator 2
         
-        # 重置蒙版按钮
-        self.btn_reset = QtWidgets.QToolButton()
-        self.btn_reset.setText("重置")
-        self.btn_reset.setIcon(QIcon(":/icons/trash.png"))
-        self.btn_reset.setToolTip("重置蒙版 [R]")
-        self.toolbar.addWidget(self.btn_reset)
-        
-        # 自动修复按钮 - 连接到新的参数化运行函数
-        self.btn_auto_fix = QtWidgets.QToolButton()
-        self.btn_auto_fix.setText("自动修复")
-        self.btn_auto_fix.setIcon(QIcon(":/icons/auto.png"))
-        self.btn_auto_fix.setToolTip("自动修复蒙版（参数可调）[A]")
+        # 重置蒙版、自动修复、自动蒙版 (替换边缘检测)、重置视图按钮
+        for spec in _EDIT_TOOLS:
+            self.toolbar.addWidget(self._make_tool(*spec))
         self.btn_auto_fix.clicked.connect(self.run_auto_fix)
-        self.toolbar.addWidget(self.btn_auto_fix)
 
-        # 自动蒙版按钮 (替换边缘检测)
-        self.btn_auto_mask = QtWidgets.QToolButton()
-        self.btn_auto_mask.setText("自动蒙版")
-        self.btn_auto_mask.setIcon(QIcon(":/icons/magic.png"))
-        self.btn_auto_mask.setToolTip("使用算法自动生成蒙版 [D]")
         self.btn_auto_mask.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.MenuButtonPopup)
-        
         auto_mask_menu = QtWidgets.QMenu(self)
-        
-        canny_action = QAction("Canny 边缘检测", self)
-        canny_action.triggered.connect(self.run_canny)
-        auto_mask_menu.addAction(canny_action)
-        
-        # Add action for Adaptive Threshold
-        adaptive_action = QAction("自适应阈值", self)
-        adaptive_action.triggered.connect(self.run_adaptive_threshold)
-        auto_mask_menu.addAction(adaptive_action)
-        
-        # Add action for GrabCut
-        grabcut_action = QAction("GrabCut 分割", self)
-        grabcut_action.setToolTip("通过绘制矩形框选前景进行分割")
-        grabcut_action.triggered.connect(self.run_grabcut)
-        auto_mask_menu.addAction(grabcut_action)
-
-        # Add action for Watershed
-        watershed_action = QAction("分水岭 分割", self)
-        watershed_action.setToolTip("通过标记前景/背景区域进行分割")
-        watershed_action.triggered.connect(self.run_watershed)
-        auto_mask_menu.addAction(watershed_action)
-        
+        for text, tip, slot in (
+            ("Canny 边缘检测", None, self.run_canny),
+            ("自适应阈值", None, self.run_adaptive_threshold),
+            ("GrabCut 分割", "通过绘制矩形框选前景进行分割", self.run_grabcut),
+            ("分水岭 分割", "通过标记前景/背景区域进行分割", self.run_watershed),
+        ):
+            action = QAction(text, self)
+            if tip:
+                action.setToolTip(tip)
+            action.triggered.connect(slot)
+            auto_mask_menu.addAction(action)
         self.btn_auto_mask.setMenu(auto_mask_menu)
         self.btn_auto_mask.clicked.connect(self.run_canny)
-        self.toolbar.addWidget(self.btn_auto_mask)
-
-        # 添加重置视图按钮
-        self.btn_reset_view = QtWidgets.QToolButton()
-        self.btn_reset_view.setText("重置视图")
-        self.btn_reset_view.setIcon(QIcon(":/icons/fit.png"))
-        self.btn_reset_view.setToolTip("重置缩放和平移 [Home]")
-        self.toolbar.addWidget(self.btn_reset_view)
         
         self.toolbar.addSeparator()
         
@@ -427,11 +488,7 @@ class MaskEditDialog(QtWidgets.QDialog):
 
         # 添加快捷键帮助按钮
         self.toolbar.addSeparator()
-        self.btn_help = QtWidgets.QToolButton()
-        self.btn_help.setText("快捷键")
-        self.btn_help.setIcon(QIcon(":/icons/help.png"))
-        self.btn_help.setToolTip("显示快捷键帮助")
-        self.toolbar.addWidget(self.btn_help)
+        self.toolbar.addWidget(self._make_tool("btn_help", "快捷键", "help.png", "显示快捷键帮助"))
         
         layout.addWidget(self.toolbar)
         
@@ -460,24 +517,33 @@ class MaskEditDialog(QtWidgets.QDialog):
         buttons.accepted.connect(self.accept)
         buttons.rejected.connect(self.reject)
         # GrabCut marker buttons
-        self.btn_gc_fg.clicked.connect(lambda: self.edit_widget.set_grabcut_marker_mode('fg'))
-        self.btn_gc_bg.clicked.connect(lambda: self.edit_widget.set_grabcut_marker_mode('bg'))
+        self.gc_marker_group.idClicked.connect(self.on_grabcut_marker_selected)
         self.btn_gc_finish.clicked.connect(self.edit_widget.finish_grabcut)
         # Watershed buttons
         self.btn_ws_run.clicked.connect(self.edit_widget.run_watershed_segmentation)
 
         # Connect the signal AFTER adding buttons
-        self.ws_marker_group.buttonClicked.connect(self.on_watershed_marker_selected)
+        self.ws_marker_group.idClicked.connect(self.on_watershed_marker_selected)
+
+    def _activate_draw(self):
+        """切换到画笔模式（快捷键B）。"""
+        self.btn_draw.setChecked(True)
+        self.edit_widget.set_mode('draw')
+
+    def _activate_erase(self):
+        """切换到橡皮模式（快捷键E）。"""
+        self.btn_erase.setChecked(True)
+        self.edit_widget.set_mode('erase')
 
     def setup_shortcuts(self):
         """设置键盘快捷键"""
         # 画笔模式
         shortcut_draw = QShortcut(QKeySequence("B"), self)
-        shortcut_draw.activated.connect(lambda: (self.btn_draw.setChecked(True), self.edit_widget.set_mode('draw')))
+        shortcut_draw.activated.connect(self._activate_draw)
         
         # 橡皮模式
         shortcut_erase = QShortcut(QKeySequence("E"), self)
-        shortcut_erase.activated.connect(lambda: (self.btn_erase.setChecked(True), self.edit_widget.set_mode('erase')))
+        shortcut_erase.activated.connect(self._activate_erase)
         
         # 撤销/重做
         shortcut_undo = QShortcut(QKeySequence("Ctrl+Z"), self)
@@ -550,13 +616,27 @@ class MaskEditDialog(QtWidgets.QDialog):
             QtWidgets.QMessageBox.StandardButton.Yes | QtWidgets.QMessageBox.StandardButton.No
         )
         if result == QtWidgets.QMessageBox.StandardButton.Yes:
-            # 创建一个全黑蒙版
-            blank_mask = np.zeros_like(self.original_mask)
-            self.edit_widget.set_mask(blank_mask)
+            # 原地清空蒙版，避免分配新的全黑蒙版再复制
+            self.edit_widget.clear_mask()
+
+    def _params_dialog(self, attr, dialog_cls):
+        """获取缓存的参数对话框，不存在时创建。
+
+        Args:
+            attr (str): 缓存对话框的实例属性名。
+            dialog_cls (type): 参数对话框类。
+        Returns:
+            QtWidgets.QDialog: 参数对话框实例。
+        """
+        dialog = getattr(self, attr)
+        if dialog is None:
+            dialog = dialog_cls(self)
+            setattr(self, attr, dialog)
+        return dialog
 
     def run_auto_fix(self):
         """显示形态学参数对话框并执行自动修复。"""
-        dialog = MorphologyParamsDialog(self)
+        dialog = self._params_dialog("_morph_dlg", MorphologyParamsDialog)
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             params = dialog.get_params()
             logging.info(f"Running Auto Fix with params: {params}")
@@ -564,124 +644,43 @@ class MaskEditDialog(QtWidgets.QDialog):
 
     def run_canny(self):
         """显示Canny参数对话框并执行边缘检测。"""
-        dialog = CannyParamsDialog(self)
+        dialog = self._params_dialog("_canny_dlg", CannyParamsDialog)
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             params = dialog.get_params()
+            # 大图在缩小的网格上近似执行闭运算，减少内存带宽
+            if min(self.original_img.shape[:2]) > APPROX_MORPH_MIN_SIDE:
+                params['approx_scale'] = APPROX_MORPH_SCALE
             logging.info(f"Running Canny edge detection with params: {params}")
-            self.edit_widget.edge_detect_canny(**params) # Pass params as keyword args
+            self.edit_widget.edge_detect_canny(**params, gray=self._gray, gpu_gray=self._gray_umat) # Pass params as keyword args
 
     def run_adaptive_threshold(self):
         """显示自适应阈值参数对话框并执行。"""
-        dialog = AdaptiveThresholdParamsDialog(self)
+        dialog = self._params_dialog("_adaptive_dlg", AdaptiveThresholdParamsDialog)
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             params = dialog.get_params()
             logging.info(f"Running Adaptive Threshold with params: {params}")
-            self.edit_widget.run_adaptive_threshold(**params)
+            self.edit_widget.run_adaptive_threshold(**params, gray=self._gray, gpu_gray=self._gray_umat)
 
     def run_grabcut(self):
         """启动 GrabCut 流程：提示用户并进入矩形框选模式。"""
-        QtWidgets.QMessageBox.information(self, "GrabCut 分割", 
-                                          "请在图像上拖动鼠标，绘制一个紧密包围主要前景对象的矩形框。")
+        self._gc_prompt.exec()
         self.edit_widget.enter_grabcut_rect_mode()
 
     def run_watershed(self):
         """启动 Watershed 流程：提示用户并进入标记模式。"""
         logging.info("Starting Watershed segmentation process")
 
-        # 创建3个直接添加到工具栏的按钮 (临时测试方案)
-        test_fg_btn = QtWidgets.QToolButton()
-        test_fg_btn.setText("测试前景")
-        test_fg_btn.setIcon(QIcon(":/icons/ws_fg.png"))
-        test_fg_btn.setToolTip("测试前景标记按钮")
-        test_fg_btn.setCheckable(True)
-        
-        test_bg_btn = QtWidgets.QToolButton()
-        test_bg_btn.setText("测试背景")
-        test_bg_btn.setIcon(QIcon(":/icons/ws_bg.png"))
-        test_bg_btn.setToolTip("测试背景标记按钮")
-        test_bg_btn.setCheckable(True)
-        
-        test_run_btn = QtWidgets.QToolButton()
-        test_run_btn.setText("测试分割")
-        test_run_btn.setIcon(QIcon(":/icons/run.png"))
-        test_run_btn.setToolTip("测试执行分割按钮")
-
-        # 用来保存按钮，防止被垃圾回收
-        self.test_buttons = [test_fg_btn, test_bg_btn, test_run_btn]
-        
-        # 直接插入到工具栏的开头
-        sep_action = self.toolbar.actions()[0]  # 获取第一个分隔符
-        self.toolbar.insertWidget(sep_action, test_run_btn)
-        self.toolbar.insertWidget(sep_action, test_bg_btn)
-        self.toolbar.insertWidget(sep_action, test_fg_btn)
-        
-        # 连接测试按钮的信号
-        test_fg_btn.clicked.connect(lambda: self.edit_widget.set_watershed_marker_mode('fg'))
-        test_bg_btn.clicked.connect(lambda: self.edit_widget.set_watershed_marker_mode('bg'))
-        test_run_btn.clicked.connect(self.edit_widget.run_watershed_segmentation)
-        
-        # 设置按钮组以确保互斥
-        test_group = QtWidgets.QButtonGroup(self)
-        test_group.addButton(test_fg_btn)
-        test_group.addButton(test_bg_btn)
-        test_group.setExclusive(True)
-        test_fg_btn.setChecked(True)
-        
-        logging.debug("测试按钮已添加到工具栏")
-
-        QtWidgets.QMessageBox.information(self, "分水岭 分割", 
-                                          "请使用前景(蓝)/背景(红)画笔标记图像区域，然后点击\"执行分割\"。")
+        self._ws_prompt.exec()
         logging.debug("Entering watershed mode")
         self.edit_widget.enter_watershed_mode()
         logging.debug("Watershed mode entered")
 
     def show_shortcuts_help(self):
         """显示快捷键和基本交互帮助信息"""
-        help_text = (
-            "<b>蒙版编辑器 - 帮助</b><br><br>"
-            
-            "<b>核心交互:</b><br>"
-            "- <b>绘制/擦除/标记:</b> 在编辑区域按住鼠标左键拖动。<br>"
-            "- <b>平移视图:</b> 按住 Shift 键并拖动鼠标左键。<br>"
-            "- <b>缩放视图:</b> 使用鼠标滚轮。<br><br>"
-            
-            "<b>主要模式 (通过工具栏按钮切换):</b><br>"
-            "- <b>绘制 [B]:</b> 添加蒙版区域 (前景)。<br>"
-            "- <b>擦除 [E]:</b> 移除蒙版区域 (背景)。<br>"
-            "- <b>GrabCut (自动蒙版菜单):</b> 通过框选和标记进行交互式分割。<br>"
-            "- <b>Watershed (自动蒙版菜单):</b> 通过标记前景/背景进行分割。<br><br>"
-            
-            "<b>工具栏按钮 (部分):</b><br>"
-            "- <b>撤销/重做 [Ctrl+Z/Y]:</b> 撤销或重做编辑步骤。<br>"
-            "- <b>重置 [R]:</b> 恢复到初始蒙版状态。<br>"
-            "- <b>自动修复 [A]:</b> 使用形态学优化蒙版。<br>"
-            "- <b>自动蒙版 [D]:</b> 提供多种自动分割算法入口。<br>"
-            "- <b>重置视图 [Home]:</b> 恢复默认缩放和平移。<br>"
-            "- <b>笔刷大小 [ \[ / \] ]:</b> 调整工具大小。<br><br>"
-
-            "<b>键盘快捷键:</b><br>"
-            "<table>"
-            "<tr><td>B</td><td>切换到绘制模式</td></tr>"
-            "<tr><td>E</td><td>切换到擦除模式</td></tr>"
-            "<tr><td>[</td><td>减小笔刷大小</td></tr>"
-            "<tr><td>]</td><td>增大笔刷大小</td></tr>"
-            "<tr><td>Ctrl+Z</td><td>撤销</td></tr>"
-            "<tr><td>Ctrl+Y</td><td>重做</td></tr>"
-            "<tr><td>R</td><td>重置蒙版</td></tr>"
-            "<tr><td>A</td><td>自动修复蒙版</td></tr>"
-            "<tr><td>D</td><td>打开自动蒙版菜单</td></tr>"
-            "<tr><td>Home</td><td>重置视图</td></tr>"
-            "<tr><td>Ctrl+S</td><td>保存并关闭</td></tr>"
-            "<tr><td>Esc</td><td>取消并关闭</td></tr>"
-            "</table><br>"
-            
-            "<i>提示: 更详细的功能说明请查看项目 `tools/README.md` 文件。</i>"
-        )
-        
         msg_box = QtWidgets.QMessageBox(self)
         msg_box.setWindowTitle("帮助与快捷键")
         msg_box.setTextFormat(Qt.TextFormat.RichText)
-        msg_box.setText(help_text)
+        msg_box.setText(_HELP_HTML)
         msg_box.setStandardButtons(QtWidgets.QMessageBox.StandardButton.Ok)
         msg_box.exec()
 
@@ -712,7 +711,7 @@ class MaskEditDialog(QtWidgets.QDialog):
             logging.debug("Toolbar updated")
             
             # 在下一个事件循环中，再次确保按钮可见性
-            QtCore.QTimer.singleShot(100, lambda: (
+            QtCore.QTimer.singleShot(0, lambda: (
                 self.btn_ws_fg.setVisible(True),
                 self.btn_ws_bg.setVisible(True),
                 self.btn_ws_run.setVisible(True),
@@ -734,15 +733,73 @@ class MaskEditDialog(QtWidgets.QDialog):
             self.btn_ws_fg.setChecked(True) # Default to FG marker
             logging.debug("WS foreground marker button checked")
 
-    def on_watershed_marker_selected(self, button):
+    def on_grabcut_marker_selected(self, marker_id):
+        """Handles selection changes in the GrabCut marker button group."""
+        self.edit_widget.set_grabcut_marker_mode(_MARKER_MODES[marker_id])
+
+    def on_watershed_marker_selected(self, marker_id):
         """Handles selection changes in the Watershed marker button group."""
-        # Determine the mode based on which button was clicked
-        # Using object comparison is safer than relying on IDs if IDs change
-        mode = 'fg' if button == self.btn_ws_fg else 'bg'
+        # 按钮ID由 _make_marker_group 分配，直接映射到标记模式
+        mode = _MARKER_MODES[marker_id]
         logging.debug(f"Watershed marker mode selected: {mode}")
         # Call the widget's method to update its internal state
         self.edit_widget.set_watershed_marker_mode(mode)
 
+# 动画预览播放时帧计数标签的最短刷新间隔（秒）
+FRAME_LABEL_INTERVAL = 0.1
+# 动画预览提前准备的帧数
+PREVIEW_PREFETCH_FRAMES = 3
+# 动画预览按需缩放的帧缓存上限；帧数不超过此值时才整体预缩放全部帧
+PREVIEW_CACHE_FRAMES = 64
+
+def _narrow_channels(img):
+    """去掉帧中不携带信息的通道，减少缩放和绘制时搬运的字节数。
+
+    Alpha全为255时丢弃Alpha通道；RGB三通道完全相同时进一步退化为灰度图。
+    没有可去掉的通道时原样返回（不复制）。
+
+    Args:
+        img (np.ndarray): RGBA/RGB帧图像。
+    Returns:
+        np.ndarray: RGBA、RGB或灰度图像。
+    """
+    if img.ndim != 3:
+        return img
+    if img.shape[2] == 4:
+        if not np.all(img[..., 3] == 255):
+            return img
+        img = img[..., :3]
+    if np.array_equal(img[..., 0], img[..., 1]) and np.array_equal(img[..., 1], img[..., 2]):
+        return img[..., 0]
+    return img
+
+def _pack_frames(frames):
+    """把需要复制的非连续帧（如收窄通道后的视图）打包进按形状分组的连续图集。
+
+    每组只分配一次 (N, H, W[, C]) 的数组，各帧成为图集中的连续切片；
+    本身已连续的帧保持原样，继续共享ROI的内存。
+
+    Args:
+        frames (list[np.ndarray]): 帧图像列表。
+    Returns:
+        list[np.ndarray]: 与输入一一对应的连续帧数组。
+    """
+    groups = {}
+    for i, frame in enumerate(frames):
+        if not frame.flags.c_contiguous:
+            groups.setdefault((frame.shape, frame.dtype), []).append(i)
+    packed = list(frames)
+    for (shape, dtype), indices in groups.items():
+        atlas = np.empty((len(indices),) + shape, dtype=dtype)
+        for slot, i in enumerate(indices):
+            atlas[slot] = frames[i]
+            packed[i] = atlas[slot]
+    return packed
+
+def _scale_frames(images, size, mode):
+    """将一组QImage等比缩放到给定尺寸（在工作线程中调用，不涉及QPixmap）。"""
+    return [image.scaled(size, Qt.AspectRatioMode.KeepAspectRatio, mode) for image in images]
+
 class AnimationPreviewDialog(QtWidgets.QDialog):
     """用于预览提取的帧序列动画效果的对话框。
 
@@ -758,6 +815,17 @@ class AnimationPreviewDialog(QtWidgets.QDialog):
         super().__init__(parent)
         self.rois = rois
         self.setWindowTitle("动画预览")
+
+        # 帧图像不会变化：原始帧以QImage保存，带有效Alpha的帧直接共享ROI数组内存，
+        # 不透明/灰度帧收窄为RGB888/Grayscale8；只有按当前预览区域尺寸预缩放的结果
+        # 才转换为QPixmap，尺寸变化时重建
+        self._frames = [ndarray_to_qimage(frame)
+                        for frame in _pack_frames([_narrow_channels(roi.img) for roi in rois])]
+        self._scaled_size = None
+        self._scaled_pixmaps = {}  # 是否平滑缩放 -> 各帧缩放后的QPixmap列表
+        self._scale_jobs = {}  # (宽, 高, 是否平滑) -> 进行中的后台缩放任务信号
+        # 按需缩放的帧LRU缓存：((宽, 高, 是否平滑), 帧号) -> QPixmap
+        self._frame_cache = collections.OrderedDict()
         self.setMinimumSize(400, 400)
         
         # 动画控制参数
@@ -765,16 +833,20 @@ class AnimationPreviewDialog(QtWidgets.QDialog):
         self.fps = 12  # 默认每秒12帧
         self.playing = False
         self.timer = QTimer(self)
+        self.timer.setTimerType(Qt.TimerType.PreciseTimer)
         self.timer.timeout.connect(self.next_frame)
+        self._next_deadline = 0.0  # 下一帧的计划显示时间 (perf_counter)
+        self._suspended = False  # 播放中因窗口隐藏/最小化而暂停了计时器
         
         # 布局
         layout = QtWidgets.QVBoxLayout(self)
         
-        # 预览图像标签
-        self.image_label = QtWidgets.QLabel()
-        self.image_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.image_label.setMinimumSize(300, 300)
-        layout.addWidget(self.image_label)
+        # 预览图像区域
+        self.preview = FramePreview()
+        self.preview.setMinimumSize(300, 300)
+        layout.addWidget(self.preview, 1)
+        self._preview_size = self.preview.size()  # 仅在resizeEvent中更新
+        self._last_displayed = None  # 上次绘制时的 (帧号, 预览尺寸, 是否播放)
         
         # 控制区域
         control_layout = QtWidgets.QHBoxLayout()
@@ -793,7 +865,9 @@ class AnimationPreviewDialog(QtWidgets.QDialog):
         control_layout.addWidget(self.fps_spin)
         
         # 帧计数显示
-        self.frame_label = QtWidgets.QLabel(f"帧: 1/{len(self.rois)}")
+        self._total_str = f"/{len(self.rois)}"
+        self._last_label_update = 0.0
+        self.frame_label = QtWidgets.QLabel(f"帧: 1{self._total_str}")
         control_layout.addWidget(self.frame_label)
         
         # 关闭按钮
@@ -813,9 +887,14 @@ class AnimationPreviewDialog(QtWidgets.QDialog):
             fps (int): 新的帧率。
         """
         self.fps = fps
-        if self.playing:
+        if self.playing and not self._suspended:
             self.timer.stop()
-            self.timer.start(1000 // self.fps)
+            self._start_timer()
+
+    def _start_timer(self):
+        """按当前帧率启动计时器，并重置帧时间基准。"""
+        self._next_deadline = time.perf_counter() + 1.0 / self.fps
+        self.timer.start(1000 // self.fps)
             
     def toggle_play(self):
         """切换播放/暂停状态。"""
@@ -823,36 +902,186 @@ class AnimationPreviewDialog(QtWidgets.QDialog):
             self.timer.stop()
             self.play_btn.setText("播放")
         else:
-            self.timer.start(1000 // self.fps)
+            self._start_timer()
             self.play_btn.setText("暂停")
         self.playing = not self.playing
+        if not self.playing:
+            # 暂停后用平滑缩放重新绘制当前帧
+            self.update_display()
         
     def next_frame(self):
-        """显示下一帧，并在到达最后一帧时循环。"""
-        self.current_frame = (self.current_frame + 1) % len(self.rois)
+        """显示下一帧，并在到达最后一帧时循环。
+
+        若计时器回调落后超过一帧（如绘制耗时过长），丢弃迟到的帧直接跳到应显示的帧，
+        避免延迟不断累积。
+        """
+        period = 1.0 / self.fps
+        step = 1
+        late = time.perf_counter() - self._next_deadline
+        if late > period:
+            skipped = int(late / period)
+            step += skipped
+            self._next_deadline += skipped * period
+        self._next_deadline += period
+        self.current_frame = (self.current_frame + step) % len(self.rois)
         self.update_display()
         
+    def _transform_mode(self):
+        """按播放状态选择缩放方式：播放中使用最近邻快速缩放，暂停时使用平滑缩放。"""
+        return (Qt.TransformationMode.FastTransformation if self.playing
+                else Qt.TransformationMode.SmoothTransformation)
+
+    def _frame_pixmap(self, idx, allow_drop=False):
+        """返回按当前预览区域尺寸和播放状态缩放后的第 idx 帧。
+
+        帧数较少时全部帧的预缩放在线程池中进行，结果就绪前及帧数较多时，
+        按需缩放并放入容量有限的LRU缓存，内存占用与序列长度无关。
+
+        Args:
+            idx (int): 帧号。
+            allow_drop (bool, optional): 缓存未命中时返回None而不在GUI线程缩放
+                （播放中预取没跟上时丢帧）. Defaults to False.
+        Returns:
+            QPixmap | None: 缩放后的帧，允许丢帧且未就绪时为None。
+        """
+        size = self._preview_size
+        if size != self._scaled_size:
+            self._scaled_size = size
+            self._scaled_pixmaps.clear()
+        smooth = not self.playing
+        frames = self._scaled_pixmaps.get(smooth)
+        if frames is not None:
+            return frames[idx]
+        if len(self._frames) <= PREVIEW_CACHE_FRAMES:
+            self._request_scaled_frames(size, smooth)
+        return self._cached_frame(idx, size, build=not allow_drop)
+
+    def _cached_frame(self, idx, size, build=True):
+        """从LRU缓存取出缩放后的单帧，未命中时在GUI线程缩放并淘汰最久未用的帧。
+
+        Args:
+            idx (int): 帧号。
+            size (QSize): 目标尺寸。
+            build (bool, optional): 未命中时是否缩放，为False时直接返回None. Defaults to True.
+        """
+        key = ((size.width(), size.height(), not self.playing), idx)
+        pixmap = self._frame_cache.get(key)
+        if pixmap is not None:
+            self._frame_cache.move_to_end(key)
+            return pixmap
+        if not build:
+            return None
+        pixmap = QPixmap.fromImage(
+            self._frames[idx].scaled(size, Qt.AspectRatioMode.KeepAspectRatio, self._transform_mode()))
+        self._frame_cache[key] = pixmap
+        if len(self._frame_cache) > PREVIEW_CACHE_FRAMES:
+            self._frame_cache.popitem(last=False)
+        return pixmap
+
+    def _prefetch_ahead(self):
+        """预缩放即将播放的几帧放入缓冲，使下一次计时器回调只需绘制。
+
+        仅在没有整体预缩放结果时使用，在事件循环空闲时执行。
+        """
+        size = self._scaled_size
+        smooth = not self.playing
+        if size is None or smooth in self._scaled_pixmaps:
+            return
+        for offset in range(1, PREVIEW_PREFETCH_FRAMES + 1):
+            self._cached_frame((self.current_frame + offset) % len(self._frames), size)
+
+    def _request_scaled_frames(self, size, smooth):
+        """提交后台任务，将全部帧缩放到给定尺寸（同一尺寸和模式只提交一次）。"""
+        key = (size.width(), size.height(), smooth)
+        if key in self._scale_jobs:
+            return
+        worker = TaskWorker(_scale_frames, list(self._frames), QtCore.QSize(size), self._transform_mode())
+        worker.signals.finished.connect(lambda images, key=key: self._on_frames_scaled(key, images))
+        worker.signals.failed.connect(lambda msg, key=key: self._scale_jobs.pop(key, None))
+        # 保存信号对象的引用，防止任务结束前被回收
+        self._scale_jobs[key] = worker.signals
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_frames_scaled(self, key, images):
+        """后台缩放完成：在GUI线程转换为QPixmap，尺寸或模式已变化时丢弃。"""
+        self._scale_jobs.pop(key, None)
+        width, height, smooth = key
+        if self._scaled_size is None or (self._scaled_size.width(), self._scaled_size.height()) != (width, height):
+            return
+        self._scaled_pixmaps[smooth] = [QPixmap.fromImage(image) for image in images]
+
     def update_display(self):
-        """更新图像显示。"""
+        """更新图像显示。
+
+        帧号、预览尺寸和缩放方式都与上次绘制相同时直接返回，合并重复的刷新请求。
+        """
         if not self.rois:
             return
+        displayed = (self.current_frame, self._preview_size, self.playing)
+        if displayed == self._last_displayed:
+            return
+        self._last_displayed = displayed
             
-        roi = self.rois[self.current_frame]
         try:
-            img_pil = Image.fromarray(roi.img)
-            img_qt = ImageQt.ImageQt(img_pil)
-            pixmap = QPixmap.fromImage(img_qt)
-            scaled_pixmap = pixmap.scaled(
-                self.image_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.image_label.setPixmap(scaled_pixmap)
-            # 更新帧计数
-            self.frame_label.setText(f"帧: {self.current_frame+1}/{len(self.rois)}")
+            pixmap = self._frame_pixmap(self.current_frame, allow_drop=self.playing)
+            if self.playing:
+                QTimer.singleShot(0, self._prefetch_ahead)
+            if pixmap is None:
+                # 预取没跟上：丢弃本帧保留上一帧画面，不在计时器回调中阻塞缩放
+                self._last_displayed = None
+                self.frame_label.setText(f"帧: {self.current_frame+1}{self._total_str} (跳帧)")
+                return
+            self.preview.set_frame(pixmap)
+            # 更新帧计数：播放中最多每 FRAME_LABEL_INTERVAL 秒刷新一次，暂停时立即刷新
+            now = time.perf_counter()
+            if not self.playing or now - self._last_label_update >= FRAME_LABEL_INTERVAL:
+                self._last_label_update = now
+                self.frame_label.setText(f"帧: {self.current_frame+1}{self._total_str}")
         except Exception as e:
             logging.exception(f"Error updating animation frame: {e}")
             
+    def resizeEvent(self, event):
+        """尺寸变化事件：丢弃旧尺寸的预缩放帧并按新尺寸重绘当前帧。"""
+        super().resizeEvent(event)
+        # 布局在本事件之前已完成，此时预览区域已是新尺寸
+        self._preview_size = self.preview.size()
+        self._scaled_pixmaps.clear()
+        self._frame_cache.clear()
+        self._scaled_size = None
+        self.update_display()
+
+    def _suspend_playback(self):
+        """窗口不可见时停止计时器，但保留播放状态以便恢复。"""
+        if self.playing and not self._suspended:
+            self.timer.stop()
+            self._suspended = True
+
+    def _resume_playback(self):
+        """窗口重新可见时恢复被挂起的播放。"""
+        if self._suspended:
+            self._suspended = False
+            if self.playing:
+                self._start_timer()
+
+    def hideEvent(self, event):
+        """隐藏事件：挂起播放，避免在不可见时继续转换和缩放帧。"""
+        self._suspend_playback()
+        super().hideEvent(event)
+
+    def showEvent(self, event):
+        """显示事件：恢复隐藏前的播放。"""
+        super().showEvent(event)
+        self._resume_playback()
+
+    def changeEvent(self, event):
+        """窗口状态变化：最小化时挂起播放，还原后恢复。"""
+        if event.type() == QtCore.QEvent.Type.WindowStateChange:
+            if self.isMinimized():
+                self._suspend_playback()
+            else:
+                self._resume_playback()
+        super().changeEvent(event)
+
     def closeEvent(self, event):
         """关闭事件：确保停止计时器。"""
         self.timer.stop()
@@ -16,17 +16,25 @@ import os
 import numpy as np
 from PyQt6 import QtWidgets, QtGui, QtCore
 from PyQt6.QtCore import QSettings, QTimer, Qt, QSize
-from PyQt6.QtGui import QIcon, QAction, QCursor, QPixmap, QImage
-from PIL import Image, ImageQt
+from PyQt6.QtGui import QIcon, QAction, QCursor, QPixmap, QImage, QPixmapCache
+from PIL import Image
 import cv2
+import io
 import json
 import logging
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyQt6.QtWidgets import QTextEdit, QDockWidget
+try:
+    import orjson # 可选依赖：更快的JSON解析
+except ImportError:
+    orjson = None
 
-from .constants import APP_NAME, APP_VERSION, DEFAULT_FRAME_SIZE, DEFAULT_BRUSH_SIZE
-from .widgets import ParamHelpLabel, ThumbListWidget, MaskEditWidget
+from .constants import APP_NAME, APP_VERSION, DEFAULT_FRAME_SIZE, DEFAULT_BRUSH_SIZE, DEFAULT_PNG_COMPRESS_LEVEL, PROXY_MAX_WIDTH
+from .widgets import ParamHelpLabel, ThumbListWidget, MaskEditWidget, TaskWorker, cached_icon, ndarray_to_qimage
 from .dialogs import MaskEditDialog, AnimationPreviewDialog
-from .mask_processor import MaskProcessor, sort_rois, filter_rois, render_filename
+from .mask_processor import MaskProcessor, build_roi_table, select_rois, render_filename, compile_template
 from .presets import PresetManager
 from .roi import FrameROI
 
@@ -35,18 +43,241 @@ class QtLogHandler(logging.Handler, QtCore.QObject):
     """自定义日志处理器，将日志记录发送到Qt信号。"""
     log_signal = QtCore.pyqtSignal(str)
 
-    def __init__(self):
+    def __init__(self, pending_capacity=1000):
         logging.Handler.__init__(self)
         QtCore.QObject.__init__(self)
+        # 日志面板隐藏时只立即发送警告及以上的记录，低级别记录暂存（不格式化），面板重新显示时补发
+        self._paused = False
+        self._pending = collections.deque(maxlen=pending_capacity)
 
     def emit(self, record):
-        """格式化日志记录并发出信号。"""
+        """格式化日志记录并发出信号；暂停期间低于WARNING的记录只暂存。"""
+        if self._paused and record.levelno < logging.WARNING:
+            self._pending.append(record)
+            return
         try:
             msg = self.format(record)
             self.log_signal.emit(msg)
         except Exception:
             self.handleError(record)
 
+    def set_paused(self, paused):
+        """暂停或恢复低级别日志的发送，恢复时按顺序补发暂存的记录。
+
+        Args:
+            paused (bool): 是否暂停（日志面板隐藏时为True）。
+        """
+        self.acquire()
+        try:
+            self._paused = paused
+            pending = [] if paused else list(self._pending)
+            if not paused:
+                self._pending.clear()
+        finally:
+            self.release()
+        for record in pending:
+            self.handle(record)
+
+class _StartupLogBuffer(logging.Handler):
+    """启动期间缓存日志记录的处理器，最多保留 capacity 条。
+
+    设置目标后先把缓存写入目标，之后直接转发；两步都在处理器锁内完成，
+    其他线程的日志既不会丢失也不会重复写入。
+    """
+
+    def __init__(self, capacity):
+        super().__init__()
+        self.buffer = collections.deque(maxlen=capacity)
+        self.target = None
+
+    def emit(self, record):
+        """缓存日志记录，已设置目标时直接转发。"""
+        if self.target is None:
+            self.buffer.append(record)
+        else:
+            self.target.handle(record)
+
+    def snapshot(self):
+        """返回当前缓存记录的副本（可在其他线程写入时调用）。"""
+        self.acquire()
+        try:
+            return list(self.buffer)
+        finally:
+            self.release()
+
+    def set_target(self, target):
+        """将缓存的记录按顺序写入 target，并改为直接转发后续记录。"""
+        self.acquire()
+        try:
+            for record in self.buffer:
+                target.handle(record)
+            self.buffer.clear()
+            self.target = target
+        finally:
+            self.release()
+
+    def close(self):
+        """关闭时一并关闭目标处理器。"""
+        self.acquire()
+        try:
+            if self.target is not None:
+                self.target.close()
+            self.buffer.clear()
+        finally:
+            self.release()
+        super().close()
+
+_SMOOTH_SCALE_BELOW = 0.5 # 预览缩放比例低于此值（缩小超过2倍）时使用平滑插值
+
+def _fit_into(src, buf, interpolation=None):
+    """将图像等比缩放写入预分配缓冲区的左上角，返回写入区域的视图。
+
+    Args:
+        src (np.ndarray): 源图像。
+        buf (np.ndarray): 预览区域大小的目标缓冲区，通道数与 src 相同。
+        interpolation (int, optional): cv2插值方式，为None时按缩放比例自动选择. Defaults to None.
+    Returns:
+        np.ndarray: 缓冲区中缩放结果所在的视图。
+    """
+    h, w = src.shape[:2]
+    scale = min(buf.shape[0] / h, buf.shape[1] / w)
+    th = min(buf.shape[0], max(1, int(h * scale)))
+    tw = min(buf.shape[1], max(1, int(w * scale)))
+    view = buf[:th, :tw]
+    if interpolation is None:
+        # 缩小超过2倍时才需要平滑；接近原尺寸或放大查看像素图时用最近邻
+        interpolation = cv2.INTER_AREA if scale < _SMOOTH_SCALE_BELOW else cv2.INTER_NEAREST
+    cv2.resize(src, (tw, th), dst=view, interpolation=interpolation)
+    return view
+
+def _render_preview_images(img, mask, img_buf, mask_buf):
+    """将ROI原图和蒙版缩放写入复用的缓冲区并包装为QImage（在工作线程中调用，不涉及QPixmap）。
+
+    Args:
+        img (np.ndarray): ROI原图像素 (RGBA)。
+        mask (np.ndarray | None): ROI蒙版 (灰度图)。
+        img_buf (np.ndarray): 原图预览区域大小的缓冲区。
+        mask_buf (np.ndarray): 蒙版预览区域大小的单通道缓冲区。
+    Returns:
+        tuple[QImage, QImage | None]: 缩放后的原图和蒙版（引用缓冲区内存），蒙版为空时为None。
+    """
+    if img.size == 0:
+        raise ValueError("Extracted original ROI pixels are empty.")
+    img_qimg = ndarray_to_qimage(_fit_into(img, img_buf))
+    mask_qimg = None
+    if mask is not None and mask.size > 0:
+        # 单通道直接作为 Grayscale8 显示，不展开为RGB；
+        # 二值蒙版用最近邻缩放，与编辑蒙版时一致，避免插值模糊边缘
+        mask_qimg = ndarray_to_qimage(_fit_into(mask, mask_buf, cv2.INTER_NEAREST))
+    return img_qimg, mask_qimg
+
+_EXPORT_WRITE_BUFFER = 512 * 1024 # 导出写文件的缓冲区大小（字节）
+
+def _pil_view(arr):
+    """将RGBA数组包装为共享内存的PIL图像，非连续数组才复制一次。
+
+    Args:
+        arr (np.ndarray): 形状为 (H, W, 4) 的uint8数组。
+    Returns:
+        PIL.Image.Image: RGBA图像，调用方需在使用期间保持 arr 存活。
+    """
+    if arr.dtype != np.uint8 or arr.ndim != 3 or arr.shape[2] != 4:
+        return Image.fromarray(arr)
+    arr = np.ascontiguousarray(arr)
+    return Image.frombuffer("RGBA", (arr.shape[1], arr.shape[0]), arr, "raw", "RGBA", 0, 1)
+
+def _save_png(img, out_path, compress_level=DEFAULT_PNG_COMPRESS_LEVEL):
+    """将帧图像编码为PNG并写入磁盘（在导出线程池中调用）。
+
+    Pillow的zlib编码会释放GIL，多个帧可在线程中并行编码。先在内存中完成编码，
+    再一次性写入文件，导出到网络驱动器时避免大量小块写入。
+
+    Args:
+        img (np.ndarray): 帧图像 (RGBA)。
+        out_path (str): 输出文件路径。
+        compress_level (int, optional): zlib压缩级别 (0-9). Defaults to DEFAULT_PNG_COMPRESS_LEVEL.
+    """
+    buf = io.BytesIO()
+    # optimize会额外尝试多种编码，导出小帧时不划算
+    _pil_view(img).save(buf, format="PNG", compress_level=compress_level, optimize=False)
+    with open(out_path, "wb", buffering=_EXPORT_WRITE_BUFFER) as f:
+        f.write(buf.getbuffer())
+
+def _unique_name(name, used_names):
+    """为重名的导出文件追加序号，保证并行写入时每帧对应不同的文件。
+
+    比较时忽略大小写，以兼容不区分大小写的文件系统。
+
+    Args:
+        name (str): 渲染出的文件名。
+        used_names (set[str]): 已分配的文件名（小写），会加入本次结果。
+    Returns:
+        str: 不与已分配文件名冲突的文件名，如 "idle.png" 重复时为 "idle_2.png"。
+    """
+    base, ext = os.path.splitext(name)
+    candidate = name
+    n = 2
+    while candidate.lower() in used_names:
+        candidate = f"{base}_{n}{ext}"
+        n += 1
+    used_names.add(candidate.lower())
+    return candidate
+
+def _load_json(path):
+    """读取JSON文件，安装了orjson时使用它解析，否则回退到标准库json。
+
+    Args:
+        path (str): JSON文件路径。
+    Returns:
+        Any: 解析结果。
+    """
+    with open(path, "rb") as f:
+        raw = f.read()
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw.decode("utf-8"))
+
+def _compute_mask_and_rois(processor, img_np, proxy, proxy_scale):
+    """生成蒙版并提取ROI（在工作线程中调用，processor 为参数快照，不与GUI线程共享）。
+
+    Args:
+        processor (MaskProcessor): 处理参数快照。
+        img_np (np.ndarray): 原图 (RGBA)。
+        proxy (np.ndarray | None): 缩小的代理图，给出时在代理图上生成蒙版后放大回原图尺寸。
+        proxy_scale (float): 代理图相对原图的缩放比例。
+    Returns:
+        tuple[np.ndarray, list[FrameROI]]: 蒙版和提取的ROI列表。
+    """
+    if proxy is not None:
+        # 拖动中：在代理图上生成蒙版再最近邻放大回原图尺寸，ROI坐标仍对应原图
+        proxy_mask = processor.gen_mask(proxy, kernel_scale=proxy_scale)
+        h, w = img_np.shape[:2]
+        mask = cv2.resize(proxy_mask, (w, h), interpolation=cv2.INTER_NEAREST)
+    else:
+        mask = processor.gen_mask(img_np)
+    return mask, processor.extract_rois(img_np, mask)
+
+# 命名模板的“插入”菜单：占位符 -> 说明
+_PLACEHOLDER_ITEMS = {
+    "[索引]": "帧的序号",
+    "[X]": "帧左上角X坐标",
+    "[Y]": "帧左上角Y坐标",
+    "[宽]": "帧宽度",
+    "[高]": "帧高度",
+    "[面积]": "帧轮廓面积",
+    "[长宽比]": "帧长宽比",
+    "[标签]": "用户自定义标签",
+    "[备注]": "用户自定义备注",
+}
+
+# 命名模板的“预设”菜单：模板 -> 示例
+_TEMPLATE_ITEMS = {
+    "帧_[索引:03d]": "Frame_001, Frame_002, ...",
+    "[标签]_[索引]": "Walk_1, Walk_2, ...",
+    "Sprite_[X]_[Y]": "Sprite_128_256, ...",
+    "[索引]": "1, 2, 3, ..."
+}
+
 class SpriteMaskEditor(QtWidgets.QMainWindow):
     """Sprite Mask 可视化编辑工具的主窗口类。
 
@@ -63,9 +294,25 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.image = None
         self.img_np = None
         self.mask = None
+        self._img_np_proxy = None # 大图的缩小副本，拖动滑块时在其上生成蒙版
+        self._proxy_scale = 1.0
+        self._interactive = False # 是否正在拖动阈值滑块
+        self._mask_is_proxy = False # 当前蒙版是否由代理图放大而来
         self.rois = []
         self._all_rois = [] # Store all rois before filtering/sorting
+        self._roi_map = {} # roi.idx -> FrameROI，随 _all_rois 一起更新，供导入标签/备注查找
+        self._roi_table = build_roi_table([]) # _all_rois 的属性表，用于向量化筛选/排序
+        self._sort_cache = {} # (排序属性, 是否降序) -> _roi_table 的排序结果
         self.current_idx = -1 # Initialize to -1
+        # 预览图在工作线程中转换缩放，代号递增，只应用最新一次请求的结果
+        self._preview_gen = 0
+        self._preview_jobs = {} # 代号 -> 进行中的后台任务信号
+        self._prefetch_jobs = {} # 缓存键 -> 进行中的相邻帧预取任务信号
+        # 预览缩放结果的缓冲区池：形状 -> 空闲缓冲区列表，预览区域尺寸不变时反复复用
+        self._preview_buffers = {}
+        # 缩放后的预览图放入 QPixmapCache；ROI列表或蒙版变化时递增版本号，使旧条目失效
+        self._preview_epoch = 0
+        QPixmapCache.setCacheLimit(65536) # KB
         self.processor = MaskProcessor()
         
         # 排序、筛选、命名相关
@@ -74,11 +321,23 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.area_range = (self.processor.min_area, self.processor.max_area) # Initialize from processor defaults
         self.aspect_range = (0, 99) # Default aspect ratio range
         self.naming_template = "frame_{idx:02d}_{x}_{y}.png"
+        self._tpl_cache = (None, None) # (模板字符串, 编译结果)，模板变化时才重新解析
+        self.png_compress_level = DEFAULT_PNG_COMPRESS_LEVEL
         
         # 参数更新节流
         self.param_update_timer = QTimer(self)
         self.param_update_timer.setSingleShot(True)
         self.param_update_timer.timeout.connect(self.delayed_param_update)
+        self._pending_affects = set() # 防抖期间累积的待处理参数类别: 'mask' / 'roi'
+        self._thresh_change_queued = False
+        # 蒙版生成在线程池中执行，代号递增，只应用最新一次请求的结果；
+        # 同一时间最多一个任务，运行期间的新请求在其完成后按最新参数重跑
+        self._mask_gen = 0
+        self._mask_jobs = {} # 代号 -> 进行中的后台任务信号
+        self._mask_rerun = False
+        # 最近一次请求的蒙版参数和上次实际提取ROI时的参数，参数未变化时跳过重新处理
+        self._requested_mask_params = None
+        self._last_roi_params = None
         
         # 预设管理器
         self.preset_manager = PresetManager(APP_NAME)
@@ -99,18 +358,39 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         # 根据加载的设置更新UI控件的初始值
         self._update_ui_from_settings()
         # --- Initialize Logging --- 
-        self._init_logging()
+        # 日志面板和日志文件推迟到窗口首次绘制之后创建，之前的日志先缓存在内存中
+        self._log_buffer = _StartupLogBuffer(capacity=1000)
+        # 各模块直接使用根日志器记录；默认只记录INFO及以上，调试日志可在日志面板中开启
+        logger = logging.getLogger() # Get root logger
+        logger.setLevel(logging.INFO)
+        logger.addHandler(self._log_buffer)
+        logging.getLogger('PIL').setLevel(logging.WARNING) # PIL 在DEBUG/INFO级别输出大量解码细节
+        QTimer.singleShot(0, self._init_logging)
 
     def _init_logging(self):
-        """初始化日志系统。"""
+        """初始化日志系统（由 __init__ 推迟到事件循环中执行）。
+
+        日志面板在GUI线程创建；日志文件在后台线程打开，打开后将缓存的日志写入文件。
+        """
         # Create QTextEdit for log output
         self.log_output = QTextEdit()
         self.log_output.setReadOnly(True)
         self.log_output.setStyleSheet("background-color:#f0f0f0; font-family: Consolas, Courier New, monospace;")
 
+        # 调试日志开关
+        debug_check = QtWidgets.QCheckBox("调试日志")
+        debug_check.setToolTip("记录DEBUG级别的日志（会增加日志量）")
+        debug_check.toggled.connect(
+            lambda checked: logging.getLogger().setLevel(logging.DEBUG if checked else logging.INFO))
+        log_widget = QtWidgets.QWidget()
+        log_layout = QtWidgets.QVBoxLayout(log_widget)
+        log_layout.setContentsMargins(0, 0, 0, 0)
+        log_layout.addWidget(debug_check)
+        log_layout.addWidget(self.log_output)
+
         # Create Dock Widget for the log output
         log_dock = QDockWidget("日志输出", self)
-        log_dock.setWidget(self.log_output)
+        log_dock.setWidget(log_widget)
         log_dock.setAllowedAreas(Qt.DockWidgetArea.BottomDockWidgetArea | Qt.DockWidgetArea.TopDockWidgetArea)
         log_dock.setObjectName("LogDockWidget") # Set object name for saving state
         self.addDockWidget(Qt.DockWidgetArea.BottomDockWidgetArea, log_dock)
@@ -125,25 +405,41 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         # Configure logging format
         log_format = logging.Formatter('%(asctime)s - %(levelname)s - %(filename)s:%(lineno)d - %(message)s', datefmt='%H:%M:%S')
         log_handler.setFormatter(log_format)
-        
-        # File handler (recommended)
+        # 日志面板关闭时只发送警告及以上的日志，其余记录暂存到重新打开时再显示
+        log_dock.visibilityChanged.connect(lambda visible: log_handler.set_paused(not visible))
+
+        # 补发窗口创建期间缓存的日志，然后接入根日志器
+        for record in self._log_buffer.snapshot():
+            log_handler.handle(record)
+        logging.getLogger().addHandler(log_handler)
+
+        # Log application start
+        logging.info(f"{APP_NAME} v{APP_VERSION} started.")
+
+        # File handler (recommended)，在后台线程打开，避免磁盘I/O阻塞首次绘制
+        threading.Thread(target=self._init_file_logging, args=(log_format,), daemon=True).start()
+
+    def _init_file_logging(self, log_format):
+        """在后台线程中打开日志文件，写入缓存的日志后由缓存处理器直接转发到文件。
+
+        Args:
+            log_format (logging.Formatter): 日志格式。
+        """
+        logger = logging.getLogger()
+        log_file = f"{APP_NAME.lower()}.log"
         try:
-            log_file = f"{APP_NAME.lower()}.log"
             file_handler = logging.FileHandler(log_file, encoding='utf-8')
             file_handler.setFormatter(log_format)
         except Exception as e:
-            print(f"Error setting up file logger: {e}") 
+            print(f"Error setting up file logger: {e}")
             file_handler = None
 
-        # Get root logger and add handlers
-        logger = logging.getLogger() # Get root logger
-        logger.setLevel(logging.DEBUG) # Set desired level to DEBUG
-        logger.addHandler(log_handler)
         if file_handler:
-            logger.addHandler(file_handler)
-
-        # Log application start
-        logging.info(f"{APP_NAME} v{APP_VERSION} started.")
+            # 缓存处理器保留在根日志器上并转发到文件，不存在两个处理器同时写文件的窗口期
+            self._log_buffer.set_target(file_handler)
+        else:
+            logger.removeHandler(self._log_buffer)
+            self._log_buffer.close()
         logging.info(f"Log file location: {os.path.abspath(log_file) if file_handler else 'Not available'}")
 
     def append_log_message(self, message):
@@ -166,34 +462,34 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.addToolBar(toolbar)
         
         # 加载图片按钮
-        self.load_action = QAction(QIcon(":/icons/open.png"), "加载图片 (Ctrl+O)", self)
+        self.load_action = QAction(cached_icon(":/icons/open.png"), "加载图片 (Ctrl+O)", self)
         toolbar.addAction(self.load_action)
         
         # 导出全部按钮
-        self.export_action = QAction(QIcon(":/icons/export.png"), "导出全部 (Ctrl+S)", self)
+        self.export_action = QAction(cached_icon(":/icons/export.png"), "导出全部 (Ctrl+S)", self)
         toolbar.addAction(self.export_action)
         
         # 批量操作按钮
         self.batch_export_btn = QtWidgets.QToolButton(self)
-        self.batch_export_btn.setIcon(QIcon(":/icons/batch_export.png"))
+        self.batch_export_btn.setIcon(cached_icon(":/icons/batch_export.png"))
         self.batch_export_btn.setText("批量导出")
         self.batch_export_btn.setToolTip("导出选中的帧")
         toolbar.addWidget(self.batch_export_btn)
         
         self.batch_tag_btn = QtWidgets.QToolButton(self)
-        self.batch_tag_btn.setIcon(QIcon(":/icons/batch_tag.png"))
+        self.batch_tag_btn.setIcon(cached_icon(":/icons/batch_tag.png"))
         self.batch_tag_btn.setText("批量标签")
         self.batch_tag_btn.setToolTip("为选中的帧批量设置标签")
         toolbar.addWidget(self.batch_tag_btn)
         
         self.batch_note_btn = QtWidgets.QToolButton(self)
-        self.batch_note_btn.setIcon(QIcon(":/icons/batch_note.png"))
+        self.batch_note_btn.setIcon(cached_icon(":/icons/batch_note.png"))
         self.batch_note_btn.setText("批量备注")
         self.batch_note_btn.setToolTip("为选中的帧批量设置备注")
         toolbar.addWidget(self.batch_note_btn)
         
         self.batch_import_btn = QtWidgets.QToolButton(self)
-        self.batch_import_btn.setIcon(QIcon(":/icons/batch_import.png"))
+        self.batch_import_btn.setIcon(cached_icon(":/icons/batch_import.png"))
         self.batch_import_btn.setText("批量导入")
         self.batch_import_btn.setToolTip("从JSON文件导入标签/备注")
         toolbar.addWidget(self.batch_import_btn)
@@ -203,29 +499,29 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         
         preset_menu = QtWidgets.QMenu("参数预设", self)
         
-        self.save_preset_action = QAction(QIcon(":/icons/save_preset.png"), "保存当前预设", self)
+        self.save_preset_action = QAction(cached_icon(":/icons/save_preset.png"), "保存当前预设", self)
         preset_menu.addAction(self.save_preset_action)
         
-        self.load_preset_action = QAction(QIcon(":/icons/load_preset.png"), "加载预设", self)
+        self.load_preset_action = QAction(cached_icon(":/icons/load_preset.png"), "加载预设", self)
         preset_menu.addAction(self.load_preset_action)
         
-        self.delete_preset_action = QAction(QIcon(":/icons/delete_preset.png"), "删除预设", self)
+        self.delete_preset_action = QAction(cached_icon(":/icons/delete_preset.png"), "删除预设", self)
         preset_menu.addAction(self.delete_preset_action)
         
         preset_button = QtWidgets.QToolButton()
-        preset_button.setIcon(QIcon(":/icons/preset.png"))
+        preset_button.setIcon(cached_icon(":/icons/preset.png"))
         preset_button.setText("预设")
         preset_button.setMenu(preset_menu)
         preset_button.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.InstantPopup)
         toolbar.addWidget(preset_button)
         
         # 动画预览按钮
-        self.preview_action = QAction(QIcon(":/icons/play.png"), "动画预览 (Ctrl+P)", self)
+        self.preview_action = QAction(cached_icon(":/icons/play.png"), "动画预览 (Ctrl+P)", self)
         toolbar.addAction(self.preview_action)
         
         # 帮助按钮
         toolbar.addSeparator()
-        self.help_action = QAction(QIcon(":/icons/help.png"), "帮助", self)
+        self.help_action = QAction(cached_icon(":/icons/help.png"), "帮助", self)
         toolbar.addAction(self.help_action)
         
         # 分割布局
@@ -298,9 +594,15 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.out_height_spin.setValue(self.processor.out_height)
         self.out_height_label = ParamHelpLabel("输出高度:", "导出帧的画布高度，所有帧自动居中。")
         
+        self.png_level_spin = QtWidgets.QSpinBox()
+        self.png_level_spin.setRange(0, 9)
+        self.png_level_spin.setValue(self.png_compress_level)
+        self.png_level_label = ParamHelpLabel("PNG压缩级别:", "导出PNG的压缩级别，0为不压缩。数值越大文件越小，但导出越慢。")
+        
         output_layout.addRow(self.max_extract_label, self.max_extract_spin)
         output_layout.addRow(self.out_width_label, self.out_width_spin)
         output_layout.addRow(self.out_height_label, self.out_height_spin)
+        output_layout.addRow(self.png_level_label, self.png_level_spin)
         
         # 排序筛选选项卡
         filter_tab = QtWidgets.QWidget()
@@ -368,25 +670,12 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         # 插入占位符按钮
         self.insert_placeholder_btn = QtWidgets.QToolButton()
         self.insert_placeholder_btn.setText("插入")
-        self.insert_placeholder_btn.setIcon(QIcon(":/icons/add.png"))
+        self.insert_placeholder_btn.setIcon(cached_icon(":/icons/add.png"))
         self.insert_placeholder_btn.setToolTip("插入占位符到当前光标位置")
         insert_menu = QtWidgets.QMenu(self)
-        placeholders = {
-            "[索引]": "帧的序号",
-            "[X]": "帧左上角X坐标",
-            "[Y]": "帧左上角Y坐标",
-            "[宽]": "帧宽度",
-            "[高]": "帧高度",
-            "[面积]": "帧轮廓面积",
-            "[长宽比]": "帧长宽比",
-            "[标签]": "用户自定义标签",
-            "[备注]": "用户自定义备注",
-        }
-        for p_text, p_tooltip in placeholders.items():
-            action = QAction(p_text, self)
-            action.setToolTip(p_tooltip)
-            action.triggered.connect(lambda checked=False, text=p_text: self.insert_placeholder(text))
-            insert_menu.addAction(action)
+        # 菜单项在首次弹出时才创建
+        insert_menu.aboutToShow.connect(
+            lambda: self._populate_menu_once(insert_menu, _PLACEHOLDER_ITEMS, self.insert_placeholder))
         self.insert_placeholder_btn.setMenu(insert_menu)
         self.insert_placeholder_btn.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.InstantPopup)
         naming_layout.addWidget(self.insert_placeholder_btn)
@@ -394,20 +683,11 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         # 预设模板按钮
         self.preset_template_btn = QtWidgets.QToolButton()
         self.preset_template_btn.setText("预设")
-        self.preset_template_btn.setIcon(QIcon(":/icons/template.png"))
+        self.preset_template_btn.setIcon(cached_icon(":/icons/template.png"))
         self.preset_template_btn.setToolTip("选择预设命名模板")
         preset_menu = QtWidgets.QMenu(self)
-        preset_templates = {
-            "帧_[索引:03d]": "Frame_001, Frame_002, ...",
-            "[标签]_[索引]": "Walk_1, Walk_2, ...",
-            "Sprite_[X]_[Y]": "Sprite_128_256, ...",
-            "[索引]": "1, 2, 3, ..."
-        }
-        for t_text, t_tooltip in preset_templates.items():
-            action = QAction(t_text, self)
-            action.setToolTip(t_tooltip)
-            action.triggered.connect(lambda checked=False, text=t_text: self.apply_preset_template(text))
-            preset_menu.addAction(action)
+        preset_menu.aboutToShow.connect(
+            lambda: self._populate_menu_once(preset_menu, _TEMPLATE_ITEMS, self.apply_preset_template))
         self.preset_template_btn.setMenu(preset_menu)
         self.preset_template_btn.setPopupMode(QtWidgets.QToolButton.ToolButtonPopupMode.InstantPopup)
         naming_layout.addWidget(self.preset_template_btn)
@@ -436,7 +716,7 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         preview_info_layout.addWidget(self.preview_info_label)
         
         self.edit_mask_btn = QtWidgets.QPushButton("编辑Mask (Ctrl+E)")
-        self.edit_mask_btn.setIcon(QIcon(":/icons/edit.png"))
+        self.edit_mask_btn.setIcon(cached_icon(":/icons/edit.png"))
         self.edit_mask_btn.setEnabled(False)
         preview_info_layout.addWidget(self.edit_mask_btn)
         
@@ -522,19 +802,21 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.help_action.triggered.connect(self.show_help)
         
         # 参数控件 - 基础
-        self.thresh_slider.valueChanged.connect(lambda value: (
-            self.thresh_label.setText(f"色差阈值: {value}"),
-            self.param_update_timer.start(300)
-        ))
+        # 标签文本直接更新；重新处理的调度合并到下一次事件循环，拖动时一批 valueChanged 只处理一次
+        self.thresh_slider.valueChanged.connect(lambda value: self.thresh_label.setText(f"色差阈值: {value}"))
+        self.thresh_slider.valueChanged.connect(self._queue_thresh_change)
+        self.thresh_slider.sliderPressed.connect(self._begin_interactive)
+        self.thresh_slider.sliderReleased.connect(self._commit_params)
         self.pad_spin.valueChanged.connect(lambda: self.on_param_change(affects='roi'))
-        self.kernel_spin.valueChanged.connect(lambda: self.param_update_timer.start(300))
-        self.close_iter_spin.valueChanged.connect(lambda: self.param_update_timer.start(300))
-        self.open_iter_spin.valueChanged.connect(lambda: self.param_update_timer.start(300))
+        self.kernel_spin.valueChanged.connect(lambda: self.on_param_change(affects='mask'))
+        self.close_iter_spin.valueChanged.connect(lambda: self.on_param_change(affects='mask'))
+        self.open_iter_spin.valueChanged.connect(lambda: self.on_param_change(affects='mask'))
         
         # 参数控件 - 输出
         self.max_extract_spin.valueChanged.connect(lambda: self.on_param_change(affects='roi'))
         self.out_width_spin.valueChanged.connect(lambda: self.on_param_change(affects='roi'))
         self.out_height_spin.valueChanged.connect(lambda: self.on_param_change(affects='roi'))
+        self.png_level_spin.valueChanged.connect(self.on_png_level_change)
         
         # 参数控件 - 排序/筛选
         self.sort_combo.currentIndexChanged.connect(self.on_sort_change)
@@ -599,6 +881,10 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             self.statusBar().showMessage("正在筛选...", 1000)
             self.refresh_sort_filter()
 
+    def on_png_level_change(self, value):
+        """处理PNG压缩级别变化（只影响导出，无需刷新预览）。"""
+        self.png_compress_level = value
+
     def on_naming_change(self):
         """处理文件命名模板输入框变化，更新预览。"""
         self.naming_template = self.naming_input.text()
@@ -608,8 +894,7 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
                 # Use the first selected frame for preview if available, otherwise the first frame
                 preview_idx = self.current_idx if 0 <= self.current_idx < len(self.rois) else 0
                 if 0 <= preview_idx < len(self.rois):
-                     # Use the updated render_filename function
-                     name = render_filename(self.naming_template, self.rois[preview_idx])
+                     name = render_filename(self._compiled_template(), self.rois[preview_idx])
                 else:
                      name = "无可用帧预览"
             except Exception as e:
@@ -620,6 +905,12 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         else:
             self.naming_preview.setText("N/A")
             
+    def _compiled_template(self):
+        """返回当前命名模板的编译结果，模板未变化时复用缓存。"""
+        if self._tpl_cache[0] != self.naming_template:
+            self._tpl_cache = (self.naming_template, compile_template(self.naming_template))
+        return self._tpl_cache[1]
+
     def on_frame_select(self, idx):
         """槽函数：响应缩略图列表的frame_selected信号，更新当前选中帧和预览。"""
         if 0 <= idx < len(self.rois):
@@ -648,29 +939,91 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             self.update_preview()
             
     def delayed_param_update(self):
-        """延迟的参数更新，用于防抖。仅处理影响 Mask 生成的参数。"""
+        """延迟的参数更新，用于防抖。
+
+        一次性同步全部参数到处理器；防抖期间有 Mask 参数变化时重新生成蒙版，
+        否则仅重新提取 ROI。参数与最近一次请求时相同（如改动后又调回原值）则不做任何处理。
+        """
+        affects = self._pending_affects
+        self._pending_affects = set()
         self.processor.color_thresh = self.thresh_slider.value()
         self.processor.kernel_size = self.kernel_spin.value()
         self.processor.close_iter = self.close_iter_spin.value()
         self.processor.open_iter = self.open_iter_spin.value()
-        
-        if self.img_np is not None:
-            self.statusBar().showMessage("正在更新蒙版和区域...", 1000)
-            self.refresh_mask_and_rois()
-            
-    def on_param_change(self, affects='unknown'):
-        """处理影响 ROI 提取或排序/筛选的参数变化。"""
         self.processor.pad = self.pad_spin.value()
         self.processor.max_extract = self.max_extract_spin.value()
         self.processor.out_width = self.out_width_spin.value()
         self.processor.out_height = self.out_height_spin.value()
-        
-        if self.img_np is not None and self.mask is not None:
+
+        if self.img_np is None:
+            return
+        if self.mask is None or ('mask' in affects and self._mask_params() != self._requested_mask_params):
+            self.statusBar().showMessage("正在更新蒙版和区域...", 1000)
+            self.refresh_mask_and_rois()
+        elif self._roi_params() != self._last_roi_params:
             self.statusBar().showMessage("正在更新区域...", 1000)
             self._extract_and_update_rois()
+
+    def _mask_params(self):
+        """影响蒙版生成的参数（含是否使用代理图），用于判断是否需要重新生成。"""
+        p = self.processor
+        use_proxy = self._interactive and self._img_np_proxy is not None
+        return (use_proxy, p.color_thresh, p.kernel_size, p.close_iter, p.open_iter)
+
+    def _roi_params(self):
+        """影响ROI提取的参数，用于判断是否需要重新提取。"""
+        p = self.processor
+        return (p.pad, p.max_extract, p.out_width, p.out_height)
+
+    def on_param_change(self, affects='mask'):
+        """记录参数变化并（重新）启动防抖定时器，连续调整只触发一次处理。
+
+        Args:
+            affects (str, optional): 变化影响的阶段，'mask' 需重新生成蒙版，'roi' 仅需重新提取. Defaults to 'mask'.
+        """
+        self._pending_affects.add(affects)
+        self.param_update_timer.start(300)
+
+    def _queue_thresh_change(self):
+        """槽函数：阈值滑块变化，同一轮事件循环内的多次变化只重启一次防抖定时器。"""
+        if self._thresh_change_queued:
+            return
+        self._thresh_change_queued = True
+        QTimer.singleShot(0, self._flush_thresh_change)
+
+    def _flush_thresh_change(self):
+        """处理已合并的阈值变化。"""
+        self._thresh_change_queued = False
+        self.on_param_change(affects='mask')
+
+    def _begin_interactive(self):
+        """槽函数：开始拖动阈值滑块，之后的蒙版在代理图上生成。"""
+        self._interactive = True
+
+    def _commit_params(self):
+        """槽函数：松开阈值滑块，立即按原图分辨率重新生成蒙版。"""
+        self._interactive = False
+        if self._mask_is_proxy or self._mask_jobs or self.param_update_timer.isActive():
+            self._pending_affects.add('mask')
+            self.param_update_timer.start(0)
+
+    def _build_proxy(self):
+        """为超过 PROXY_MAX_WIDTH 的图像生成缩小的代理图，小图不需要代理。"""
+        h, w = self.img_np.shape[:2]
+        if w <= PROXY_MAX_WIDTH:
+            self._img_np_proxy = None
+            self._proxy_scale = 1.0
+            return
+        self._proxy_scale = PROXY_MAX_WIDTH / w
+        proxy_size = (PROXY_MAX_WIDTH, max(1, int(round(h * self._proxy_scale))))
+        self._img_np_proxy = cv2.resize(self.img_np, proxy_size, interpolation=cv2.INTER_AREA)
             
     def update_preview(self):
-        """更新右侧预览区域（原图、Mask、标签、备注、信息）。"""
+        """更新右侧预览区域（原图、Mask、标签、备注、信息）。
+
+        原图和蒙版的转换与缩放提交到线程池执行，完成后由 _on_preview_ready 在GUI线程显示。
+        """
+        self._preview_gen += 1
         if self.img_np is None or not self.rois or self.current_idx < 0 or self.current_idx >= len(self.rois):
             self.img_label.clear()
             self.img_label.setText("无预览")
@@ -693,42 +1046,14 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             self.update_preview()
             return
 
-        try:
-            original_roi_pixels = self.img_np[roi.y:roi.y+roi.h, roi.x:roi.x+roi.w].copy()
-            if original_roi_pixels.size == 0:
-                raise ValueError("Extracted original ROI pixels are empty.")
-            img_qt = ImageQt.ImageQt(Image.fromarray(original_roi_pixels))
-            pix = QPixmap.fromImage(img_qt)
-            scaled_pix = pix.scaled(
-                self.img_label.size(),
-                Qt.AspectRatioMode.KeepAspectRatio,
-                Qt.TransformationMode.SmoothTransformation
-            )
-            self.img_label.setPixmap(scaled_pix)
-        except Exception as e:
-            logging.exception(f"Error updating image preview for ROI #{roi.idx}: {e}")
-            self.img_label.setText("原图错误")
-
-        try:
-            mask_data = roi.mask
-            if mask_data is not None and mask_data.size > 0:
-                mask_rgb = cv2.cvtColor(mask_data, cv2.COLOR_GRAY2RGB)
-                mask_img = Image.fromarray(mask_rgb.astype(np.uint8))
-                mask_qt = ImageQt.ImageQt(mask_img)
-                mask_pix = QPixmap.fromImage(mask_qt)
-                scaled_mask_pix = mask_pix.scaled(
-                    self.mask_label.size(),
-                    Qt.AspectRatioMode.KeepAspectRatio,
-                    Qt.TransformationMode.SmoothTransformation
-                )
-                self.mask_label.setPixmap(scaled_mask_pix)
-            else:
-                self.mask_label.setText("无Mask")
-                self.mask_label.setPixmap(QPixmap())
-        except Exception as e:
-            logging.exception(f"Error updating mask preview: {e}")
-            self.mask_label.setText("Mask错误")
-            self.mask_label.setPixmap(QPixmap())
+        cache_key = self._preview_cache_key(roi)
+        cached_img = QPixmapCache.find(cache_key + "|img")
+        cached_mask = QPixmapCache.find(cache_key + "|mask")
+        if cached_img is not None and cached_mask is not None:
+            self.img_label.setPixmap(cached_img)
+            self.mask_label.setPixmap(cached_mask)
+        else:
+            self._request_preview(self._preview_gen, roi, cache_key)
 
         self.tag_edit.setText(roi.tag)
         self.tag_edit.setEnabled(True)
@@ -740,6 +1065,121 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.edit_mask_btn.setEnabled(True)
         
         self.on_naming_change()
+        # 当前帧提交后再预取相邻帧，方向键切换时可直接命中缓存
+        QTimer.singleShot(0, self._prefetch_neighbours)
+
+    def _preview_cache_key(self, roi):
+        """返回ROI预览图在 QPixmapCache 中的键（包含版本号和预览区域尺寸）。"""
+        return (f"preview|{self._preview_epoch}|{roi.idx}|"
+                f"{self.img_label.width()}x{self.img_label.height()}|"
+                f"{self.mask_label.width()}x{self.mask_label.height()}")
+
+    def _make_preview_job(self, roi):
+        """创建转换并缩放ROI原图和蒙版的后台任务，由调用方连接信号后启动。
+
+        Returns:
+            tuple[TaskWorker, tuple[np.ndarray, np.ndarray]]: 尚未启动的任务及其使用的缓冲区。
+        """
+        # 直接传视图：img_np不会被原地修改，工作线程按原行跨度读取，无需先复制
+        original_roi_pixels = self.img_np[roi.y:roi.y+roi.h, roi.x:roi.x+roi.w]
+        bufs = (self._take_preview_buffer(self.img_label, original_roi_pixels.shape[2:]),
+                self._take_preview_buffer(self.mask_label, ()))
+        return TaskWorker(_render_preview_images, original_roi_pixels, roi.mask, *bufs), bufs
+
+    def _request_preview(self, gen, roi, cache_key):
+        """提交当前帧的预览任务，完成后显示。"""
+        worker, bufs = self._make_preview_job(roi)
+        worker.signals.finished.connect(lambda images, gen=gen: self._on_preview_ready(gen, cache_key, images, bufs))
+        worker.signals.failed.connect(lambda msg, gen=gen: self._on_preview_failed(gen, bufs))
+        # 保存信号对象的引用，防止任务结束前被回收
+        self._preview_jobs[gen] = worker.signals
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _prefetch_neighbours(self):
+        """在后台预先生成当前帧前后两帧的预览图，只写入 QPixmapCache，不显示。"""
+        if self.img_np is None or not (0 <= self.current_idx < len(self.rois)):
+            return
+        for i in (self.current_idx + 1, self.current_idx - 1):
+            if not 0 <= i < len(self.rois):
+                continue
+            roi = self.rois[i]
+            cache_key = self._preview_cache_key(roi)
+            if cache_key in self._prefetch_jobs or QPixmapCache.find(cache_key + "|img") is not None:
+                continue
+            worker, bufs = self._make_preview_job(roi)
+            worker.signals.finished.connect(lambda images, key=cache_key, bufs=bufs: self._on_prefetch_ready(key, images, bufs))
+            worker.signals.failed.connect(lambda msg, key=cache_key, bufs=bufs: self._on_prefetch_failed(key, bufs))
+            self._prefetch_jobs[cache_key] = worker.signals
+            QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_prefetch_ready(self, cache_key, images, bufs):
+        """预取完成：在GUI线程转换为QPixmap并写入缓存；版本号已变化时丢弃。"""
+        self._prefetch_jobs.pop(cache_key, None)
+        if cache_key.startswith(f"preview|{self._preview_epoch}|"):
+            img_qimg, mask_qimg = images
+            QPixmapCache.insert(cache_key + "|img", QPixmap.fromImage(img_qimg))
+            if mask_qimg is not None:
+                QPixmapCache.insert(cache_key + "|mask", QPixmap.fromImage(mask_qimg))
+        self._release_preview_buffers(bufs)
+
+    def _on_prefetch_failed(self, cache_key, bufs):
+        """预取失败（异常已由工作线程记录）：只回收缓冲区，切换到该帧时会重新生成。"""
+        self._prefetch_jobs.pop(cache_key, None)
+        self._release_preview_buffers(bufs)
+
+    def _take_preview_buffer(self, label, channel_shape):
+        """从缓冲区池中取出与预览控件等大的缓冲区，尺寸变化后才重新分配。
+
+        Args:
+            label (QWidget): 预览控件。
+            channel_shape (tuple): 通道维度，如 (4,)。
+        Returns:
+            np.ndarray: uint8缓冲区。
+        """
+        shape = (max(1, label.height()), max(1, label.width())) + tuple(channel_shape)
+        free = self._preview_buffers.get(shape)
+        return free.pop() if free else np.empty(shape, dtype=np.uint8)
+
+    def _release_preview_buffers(self, bufs):
+        """QPixmap已复制完像素后，将缓冲区放回池中；只保留当前预览尺寸的缓冲区。"""
+        current = {(max(1, label.height()), max(1, label.width())) for label in (self.img_label, self.mask_label)}
+        self._preview_buffers = {shape: free for shape, free in self._preview_buffers.items()
+                                 if shape[:2] in current}
+        for buf in bufs:
+            if buf.shape[:2] in current:
+                free = self._preview_buffers.setdefault(buf.shape, [])
+                if len(free) < 2:
+                    free.append(buf)
+
+    def _on_preview_ready(self, gen, cache_key, images, bufs):
+        """后台转换完成：在GUI线程转换为QPixmap、写入缓存并显示，已有更新的请求时丢弃。"""
+        self._preview_jobs.pop(gen, None)
+        if gen != self._preview_gen:
+            self._release_preview_buffers(bufs)
+            return
+        img_qimg, mask_qimg = images
+        img_pix = QPixmap.fromImage(img_qimg)
+        QPixmapCache.insert(cache_key + "|img", img_pix)
+        self.img_label.setPixmap(img_pix)
+        if mask_qimg is not None:
+            mask_pix = QPixmap.fromImage(mask_qimg)
+            QPixmapCache.insert(cache_key + "|mask", mask_pix)
+            self.mask_label.setPixmap(mask_pix)
+        else:
+            self.mask_label.setText("无Mask")
+            self.mask_label.setPixmap(QPixmap())
+        # QPixmap持有独立副本后缓冲区即可复用
+        self._release_preview_buffers(bufs)
+
+    def _on_preview_failed(self, gen, bufs):
+        """后台转换失败（异常已由工作线程记录）：显示错误占位文本。"""
+        self._preview_jobs.pop(gen, None)
+        self._release_preview_buffers(bufs)
+        if gen != self._preview_gen:
+            return
+        self.img_label.setText("原图错误")
+        self.mask_label.setText("Mask错误")
+        self.mask_label.setPixmap(QPixmap())
 
     def on_edit_mask(self):
         """槽函数：响应编辑Mask按钮点击。"""
@@ -748,28 +1188,25 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             
         roi = self.rois[self.current_idx]
         
-        original_img_segment = self.img_np[roi.y:roi.y+roi.h, roi.x:roi.x+roi.w].copy()
+        # 只读视图即可：对话框只读取原图，需要可写副本的 MaskEditWidget 自行复制
+        original_img_segment = self.img_np[roi.y:roi.y+roi.h, roi.x:roi.x+roi.w]
+        original_img_segment.flags.writeable = False
+        # 蒙版与原图片段都是 (h, w)，无需缩放
         current_mask = roi.get_current_mask()
-        
-        if current_mask.shape[:2] != original_img_segment.shape[:2]:
-            current_mask = cv2.resize(current_mask, 
-                                      (original_img_segment.shape[1], original_img_segment.shape[0]), 
-                                      interpolation=cv2.INTER_NEAREST)
 
         dialog = MaskEditDialog(self, original_img_segment, current_mask)
         
         if dialog.exec() == QtWidgets.QDialog.DialogCode.Accepted:
             edited_mask = dialog.get_mask()
+            if edited_mask.shape[:2] != (roi.h, roi.w):
+                edited_mask = cv2.resize(edited_mask, (roi.w, roi.h), interpolation=cv2.INTER_NEAREST)
             
             roi.mask = edited_mask
             roi.add_mask_to_history(edited_mask)
+            self._preview_epoch += 1
 
             try:
-                if edited_mask.shape[:2] != roi.img.shape[:2]:
-                    alpha_mask = cv2.resize(edited_mask, (roi.img.shape[1], roi.img.shape[0]), interpolation=cv2.INTER_NEAREST)
-                else:
-                    alpha_mask = edited_mask
-                roi.img[..., 3] = alpha_mask
+                roi.apply_mask_alpha(edited_mask)
             except Exception as e:
                 logging.exception(f"Error applying edited mask to ROI image alpha: {e}")
 
@@ -777,26 +1214,51 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
 
             if 0 <= self.current_idx < len(self.thumb_list.thumb_labels):
                 try:
-                    qimg = ImageQt.ImageQt(Image.fromarray(roi.img))
-                    thumb = QtGui.QPixmap.fromImage(qimg)
-                    thumb = thumb.scaled(80, 80, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
-                    self.thumb_list.thumb_labels[self.current_idx].setPixmap(thumb)
-                    self.thumb_list.update_selection_visuals()
+                    self.thumb_list.update_thumb(self.current_idx, roi.img)
                 except Exception as e:
                     logging.exception(f"Error updating thumbnail after mask edit: {e}")
             
             self.statusBar().showMessage(f"帧 #{roi.idx} 的 Mask 已更新", 3000)
 
     def on_tag_changed(self):
-        """槽函数：当标签输入框完成编辑时调用。"""
-        if self.rois and 0 <= self.current_idx < len(self.rois):
-            self.rois[self.current_idx].tag = self.tag_edit.text()
-            self.on_naming_change()
+        """槽函数：当标签输入框完成编辑时调用。
+
+        只修改当前帧的属性；标签不参与排序/筛选，不刷新列表。
+        """
+        self._set_current_text_attr('tag', self.tag_edit.text())
 
     def on_note_changed(self):
         """槽函数：当备注输入框完成编辑时调用。"""
-        if self.rois and 0 <= self.current_idx < len(self.rois):
-            self.rois[self.current_idx].note = self.note_edit.text()
+        self._set_current_text_attr('note', self.note_edit.text())
+
+    def _set_current_text_attr(self, attr, value):
+        """更新当前帧的标签/备注；值未变化（如仅失去焦点）时不做任何处理。
+
+        Args:
+            attr (str): 'tag' 或 'note'。
+            value (str): 新的值。
+        """
+        if not (self.rois and 0 <= self.current_idx < len(self.rois)):
+            return
+        roi = self.rois[self.current_idx]
+        if getattr(roi, attr) == value:
+            return
+        setattr(roi, attr, value)
+        if self._template_uses(attr):
+            self.on_naming_change()
+
+    def _template_uses(self, attr):
+        """当前命名模板是否引用了给定的ROI属性。"""
+        return any(not isinstance(part, str) and part[1] == attr for part in self._compiled_template())
+
+    def _refresh_text_fields(self):
+        """批量修改标签/备注后，只刷新当前帧的文本控件和命名预览，不重建预览图。"""
+        if not (self.rois and 0 <= self.current_idx < len(self.rois)):
+            return
+        roi = self.rois[self.current_idx]
+        self.tag_edit.setText(roi.tag)
+        self.note_edit.setText(roi.note)
+        self.on_naming_change()
 
     def export_all(self):
         """导出当前筛选和排序后的所有帧。"""
@@ -827,31 +1289,48 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         progress.setWindowTitle("导出进度")
         progress.setWindowModality(Qt.WindowModality.WindowModal)
         
+        # 文件名在主线程中统一生成，编码和写盘交给线程池并行执行
+        tasks = []
+        used_names = set()
+        compiled = self._compiled_template()
+        for roi in rois_list:
+            try:
+                name = render_filename(compiled, roi)
+            except Exception as e:
+                logging.warning(f"Filename template error for ROI {roi.idx}: {e}, using default.")
+                name = f"frame_{roi.idx:02d}.png"
+                
+            if not name.lower().endswith(".png"):
+                name += ".png"
+            name = _unique_name(name, used_names)
+            tasks.append((roi, name))
+        
         exported = 0
         errors = 0
-        for i, roi in enumerate(rois_list):
-            progress.setValue(i)
-            if progress.wasCanceled():
-                break
-            
-            try:
-                out_pil = Image.fromarray(roi.img)
-                try:
-                    name = render_filename(self.naming_template, roi)
-                except Exception as e:
-                    logging.warning(f"Filename template error for ROI {roi.idx}: {e}, using default.")
-                    name = f"frame_{roi.idx:02d}.png"
-                    
-                if not name.lower().endswith(".png"):
-                    name += ".png"
-                    
-                out_path = os.path.join(out_dir, name)
-                out_pil.save(out_path)
+        futures = {}
+        executor = ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        try:
+            futures = {executor.submit(_save_png, roi.img, os.path.join(out_dir, name),
+                                       self.png_compress_level): (roi, name)
+                       for roi, name in tasks}
+            for i, future in enumerate(as_completed(futures)):
+                progress.setValue(i)
+                if progress.wasCanceled():
+                    break
+        finally:
+            # 取消后丢弃尚未开始的任务，已在编码的帧会写完
+            executor.shutdown(wait=True, cancel_futures=True)
+        
+        # 线程池结束后统一统计，取消时已写完的帧也计入
+        for future, (roi, name) in futures.items():
+            if future.cancelled():
+                continue
+            error = future.exception()
+            if error is None:
                 exported += 1
-            except Exception as e:
+            else:
                 errors += 1
-                logging.error(f"Error exporting ROI #{roi.idx} ('{name}'): {str(e)}")
-                self.statusBar().showMessage(f"导出第 {i+1} 帧时出错: {str(e)}", 3000)
+                logging.error(f"Error exporting ROI #{roi.idx} ('{name}'): {str(error)}")
             
         progress.setValue(len(rois_list))
         
@@ -869,14 +1348,7 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             
         tag, ok = QtWidgets.QInputDialog.getText(self, "批量标签", "为选中的帧输入标签：")
         if ok:
-            updated_count = 0
-            for idx in selected:
-                if 0 <= idx < len(self.rois):
-                    self.rois[idx].tag = tag
-                    updated_count += 1
-                    
-            if self.current_idx in selected:
-                self.update_preview()
+            updated_count = self._batch_set_text_attr(selected, 'tag', tag)
             self.statusBar().showMessage(f"已为 {updated_count} 帧设置标签: {tag}", 3000)
                 
     def batch_set_note(self):
@@ -887,16 +1359,32 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             
         note, ok = QtWidgets.QInputDialog.getText(self, "批量备注", "为选中的帧输入备注：")
         if ok:
-            updated_count = 0
-            for idx in selected:
-                if 0 <= idx < len(self.rois):
-                    self.rois[idx].note = note
-                    updated_count += 1
-                    
-            if self.current_idx in selected:
-                self.update_preview()
+            updated_count = self._batch_set_text_attr(selected, 'note', note)
             self.statusBar().showMessage(f"已为 {updated_count} 帧设置备注", 3000)
 
+    def _batch_set_text_attr(self, indices, attr, value):
+        """为一组帧设置相同的标签/备注。
+
+        只有当前帧在其中时才刷新文本控件；值已相同的帧跳过写入。
+
+        Args:
+            indices (Iterable[int]): 帧在当前列表中的索引。
+            attr (str): 'tag' 或 'note'。
+            value (str): 新的值。
+        Returns:
+            int: 有效索引的数量。
+        """
+        n = len(self.rois)
+        targets = [self.rois[i] for i in indices if 0 <= i < n]
+        changed = False
+        for roi in targets:
+            if getattr(roi, attr) != value:
+                setattr(roi, attr, value)
+                changed = True
+        if changed and self.current_idx in indices:
+            self._refresh_text_fields()
+        return len(targets)
+
     def batch_import(self):
         """从JSON文件导入标签和备注。JSON应为对象列表，每个对象包含 'idx', 'tag', 'note'。"""
         file, _ = QtWidgets.QFileDialog.getOpenFileName(
@@ -908,14 +1396,13 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.last_dir = os.path.dirname(file)
         
         try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
+            data = _load_json(file)
                 
             if not isinstance(data, list):
                 raise ValueError("JSON data must be a list of objects.")
             
             updated = 0
-            roi_map = {roi.idx: roi for roi in self._all_rois}
+            roi_map = self._roi_map
             for item in data:
                 if not isinstance(item, dict): continue
                 idx = item.get("idx")
@@ -928,7 +1415,7 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
                     updated += 1
                     
             if updated > 0:
-                self.update_preview()
+                self._refresh_text_fields()
                 self.statusBar().showMessage(f"从文件更新了 {updated} 帧的标签/备注", 3000)
             else:
                 self.statusBar().showMessage(f"未找到匹配的帧索引进行更新", 3000)
@@ -1137,8 +1624,13 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.last_dir = self.settings.value("last_directory", ".")
         
         proc_params = {}
-        for key in self.processor.get_params():
-            value = self.settings.value(f"processor_{key}")
+        self.settings.beginGroup("processor")
+        saved = {key: self.settings.value(key) for key in self.processor.get_params()}
+        self.settings.endGroup()
+        for key, value in saved.items():
+            if value is None:
+                # 兼容旧版本按 processor_<参数名> 平铺保存的设置
+                value = self.settings.value(f"processor_{key}")
             if value is not None:
                 default_value = getattr(self.processor, key, None)
                 if isinstance(default_value, int):
@@ -1152,6 +1644,7 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         self.sort_by = self.settings.value("sort_by", self.sort_by)
         self.sort_reverse = self.settings.value("sort_reverse", self.sort_reverse, type=bool)
         self.naming_template = self.settings.value("naming_template", self.naming_template)
+        self.png_compress_level = self.settings.value("png_compress_level", self.png_compress_level, type=int)
         
         try:
             self.area_range = tuple(map(int, self.settings.value("area_range", self.area_range)))
@@ -1189,20 +1682,26 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         
         self.naming_input.setText(self.naming_template)
         self.on_naming_change()
+        self.png_level_spin.setValue(self.png_compress_level)
         
     def closeEvent(self, event):
         """窗口关闭事件处理：保存应用设置。"""
         self.settings.setValue("geometry", self.saveGeometry())
         
+        self.settings.beginGroup("processor")
         for key, value in self.processor.get_params().items():
-            self.settings.setValue(f"processor_{key}", value)
+            self.settings.setValue(key, value)
+        self.settings.endGroup()
             
         self.settings.setValue("sort_by", self.sort_by)
         self.settings.setValue("sort_reverse", self.sort_reverse)
         self.settings.setValue("area_range", list(self.area_range))
         self.settings.setValue("aspect_range", list(self.aspect_range))
         self.settings.setValue("naming_template", self.naming_template)
+        self.settings.setValue("png_compress_level", self.png_compress_level)
         self.settings.setValue("last_directory", self.last_dir)
+        # 所有设置写完后统一落盘一次
+        self.settings.sync()
         
         super().closeEvent(event)
 
@@ -1241,23 +1740,89 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
         QtWidgets.QApplication.processEvents()
         try:
             self.image = Image.open(fname).convert("RGBA")
-            self.img_np = np.array(self.image)
+            # asarray 经数组接口取得像素，不再额外复制一份；结果只读，后续处理都不会原地修改原图
+            self.img_np = np.asarray(self.image)
+            self._build_proxy()
             self.setWindowTitle(f'Sprite Mask 可视化操作台 - {os.path.basename(fname)}')
             self.refresh_mask_and_rois()
         except Exception as e:
             QtWidgets.QMessageBox.critical(self, "加载失败", f"无法加载图片: {str(e)}")
 
     def refresh_mask_and_rois(self):
-        """核心刷新逻辑：重新生成蒙版并提取、排序、筛选ROIs，然后更新UI。"""
+        """核心刷新逻辑：重新生成蒙版并提取、排序、筛选ROIs，然后更新UI。
+
+        蒙版生成和ROI提取提交到线程池执行，完成后由 _on_mask_ready 在GUI线程更新界面。
+        """
         if self.img_np is None:
             return
         self.statusBar().showMessage("正在处理图像...", 0)
-        QtWidgets.QApplication.processEvents()
-        self.mask = self.processor.gen_mask(self.img_np)
-        self._extract_and_update_rois()
+        # 记录最新请求的参数并使进行中的任务结果作废
+        self._requested_mask_params = self._mask_params()
+        self._mask_gen += 1
+        if self._mask_jobs:
+            # 已有任务在运行：不并发提交，等它结束后按最新参数重跑
+            self._mask_rerun = True
+            return
+        self._start_mask_job()
+
+    def _start_mask_job(self):
+        """按当前参数提交蒙版生成任务（代号为当前的 _mask_gen）。"""
+        gen = self._mask_gen
+        params = (self._mask_params(), self._roi_params())
+        use_proxy = params[0][0]
+        snapshot = MaskProcessor(**self.processor.get_params())
+        worker = TaskWorker(_compute_mask_and_rois, snapshot, self.img_np,
+                            self._img_np_proxy if use_proxy else None, self._proxy_scale)
+        worker.signals.finished.connect(lambda result, gen=gen: self._on_mask_ready(gen, params, result))
+        worker.signals.failed.connect(lambda msg, gen=gen: self._on_mask_failed(gen, msg))
+        # 保存信号对象的引用，防止任务结束前被回收
+        self._mask_jobs[gen] = worker.signals
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_mask_ready(self, gen, params, result):
+        """后台蒙版生成完成：更新蒙版和ROI列表，已有更新的请求时丢弃。
+
+        Args:
+            gen (int): 请求代号。
+            params (tuple): 提交任务时的 (蒙版参数, ROI参数)。
+            result (tuple): (蒙版, ROI列表)。
+        """
+        self._mask_jobs.pop(gen, None)
+        if self._run_pending_mask_job() or gen != self._mask_gen:
+            return
+        mask_params, roi_params = params
+        self.mask, rois = result
+        self._mask_is_proxy = mask_params[0]
+        if roi_params != self._roi_params():
+            # 任务执行期间ROI参数又有变化，按当前参数在新蒙版上重新提取
+            self._extract_and_update_rois()
+        else:
+            self._set_rois(rois, roi_params)
         count = len(self.rois)
         self.statusBar().showMessage(f"已检测到 {count} 个区域", 3000)
 
+    def _on_mask_failed(self, gen, msg):
+        """后台蒙版生成失败（异常已由工作线程记录）。"""
+        self._mask_jobs.pop(gen, None)
+        if self._run_pending_mask_job() or gen != self._mask_gen:
+            return
+        # 允许用相同参数再次尝试
+        self._requested_mask_params = None
+        self.statusBar().showMessage(f"处理图像出错: {msg}", 5000)
+
+    def _run_pending_mask_job(self):
+        """上一个任务结束后，若期间有新的请求则按最新参数提交。
+
+        Returns:
+            bool: 是否提交了新任务。
+        """
+        if not self._mask_rerun or self.img_np is None:
+            return False
+        self._mask_rerun = False
+        self._requested_mask_params = self._mask_params()
+        self._start_mask_job()
+        return True
+
     def refresh_rois_only(self):
         """仅重新提取、排序、筛选ROIs，不重新生成蒙版，然后更新UI。"""
         if self.img_np is None or self.mask is None:
@@ -1274,9 +1839,7 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             return
         self.statusBar().showMessage("正在排序和筛选...", 0)
         QtWidgets.QApplication.processEvents()
-        filtered_rois = filter_rois(self._all_rois, area_range=self.area_range, aspect_range=self.aspect_range)
-        sorted_rois = sort_rois(filtered_rois, by=self.sort_by, reverse=self.sort_reverse)
-        self.rois = sorted_rois
+        self._apply_sort_filter()
         self.thumb_list.set_thumbs([r.img for r in self.rois])
         if self.rois:
             self.current_idx = 0
@@ -1292,11 +1855,23 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
 
     def _extract_and_update_rois(self):
         """提取ROIs，应用排序/筛选，并更新UI（缩略图列表和预览）。"""
-        extracted_rois = self.processor.extract_rois(self.img_np, self.mask)
+        self._set_rois(self.processor.extract_rois(self.img_np, self.mask), self._roi_params())
+
+    def _set_rois(self, extracted_rois, roi_params):
+        """保存提取结果，应用排序/筛选，并更新UI（缩略图列表和预览）。
+
+        Args:
+            extracted_rois (list[FrameROI]): 提取的ROI列表。
+            roi_params (tuple): 提取时使用的ROI参数。
+        """
         self._all_rois = extracted_rois
-        filtered_rois = filter_rois(extracted_rois, area_range=self.area_range, aspect_range=self.aspect_range)
-        sorted_rois = sort_rois(filtered_rois, by=self.sort_by, reverse=self.sort_reverse)
-        self.rois = sorted_rois
+        self._roi_map = {roi.idx: roi for roi in extracted_rois}
+        self._roi_table = build_roi_table(extracted_rois)
+        self._sort_cache = {}
+        self.thumb_list.clear_pixmap_cache()
+        self._last_roi_params = roi_params
+        self._preview_epoch += 1
+        self._apply_sort_filter()
         self.thumb_list.set_thumbs([r.img for r in self.rois])
         if self.rois:
             self.current_idx = 0
@@ -1308,6 +1883,28 @@ class SpriteMaskEditor(QtWidgets.QMainWindow):
             self.mask_label.clear()
         self.on_naming_change()
 
+    def _apply_sort_filter(self):
+        """按当前筛选范围和排序方式，从 _all_rois 中选出 self.rois。"""
+        order = select_rois(self._roi_table, area_range=self.area_range, aspect_range=self.aspect_range,
+                            by=self.sort_by, reverse=self.sort_reverse, sort_cache=self._sort_cache)
+        self.rois = [self._all_rois[i] for i in order]
+
+    def _populate_menu_once(self, menu, items, slot):
+        """首次弹出菜单时创建菜单项，之后直接复用。
+
+        Args:
+            menu (QMenu): 目标菜单。
+            items (dict[str, str]): 菜单文本 -> 提示文本。
+            slot (callable): 点击菜单项时以菜单文本为参数调用。
+        """
+        if menu.actions():
+            return
+        for text, tooltip in items.items():
+            action = QAction(text, self)
+            action.setToolTip(tooltip)
+            action.triggered.connect(lambda checked=False, text=text: slot(text))
+            menu.addAction(action)
+
     def insert_placeholder(self, placeholder):
         """将占位符插入命名模板输入框的当前光标位置。"""
         self.naming_input.insert(placeholder)
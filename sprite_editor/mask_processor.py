@@ -16,6 +16,99 @@ from .roi import FrameROI
 import re
 import logging
 import os
+import functools
+import threading
+try:
+    from numba import njit, prange # 可选依赖：融合的逐像素蒙版内核
+except ImportError:
+    njit = None
+
+def _place_rois(boxes, pad, img_w, img_h, out_w, out_h):
+    """一次性计算全部ROI的扩展外接框和在输出画布上的居中位置。
+
+    Args:
+        boxes (np.ndarray): 形状为 (N, 4) 的外接框 [x, y, w, h]。
+        pad (int): 向外扩展的像素数。
+        img_w (int): 原图宽度。
+        img_h (int): 原图高度。
+        out_w (int): 输出画布宽度。
+        out_h (int): 输出画布高度。
+
+    Returns:
+        np.ndarray: 形状为 (N, 8) 的int64数组，每行为
+            [x, y, w, h, 画布起始y, 画布起始x, 拷贝高度, 拷贝宽度]。
+    """
+    boxes = boxes.astype(np.int64)
+    x = np.maximum(boxes[:, 0] - pad, 0)
+    y = np.maximum(boxes[:, 1] - pad, 0)
+    w = np.minimum(img_w - x, boxes[:, 2] + 2 * pad)
+    h = np.minimum(img_h - y, boxes[:, 3] + 2 * pad)
+    sy = np.maximum((out_h - h) // 2, 0)
+    sx = np.maximum((out_w - w) // 2, 0)
+    cy = np.minimum(h, out_h - sy)
+    cx = np.minimum(w, out_w - sx)
+    return np.stack([x, y, w, h, sy, sx, cy, cx], axis=1)
+
+def _min_sq_distance(rgb, samples):
+    """计算每个像素到最近背景样本颜色的平方距离。
+
+    逐个样本在二维数组上计算并就地取最小值，不生成 (H*W, K, 3) 的临时数组，
+    也省去开方；调用方与阈值的平方比较即可。
+
+    Args:
+        rgb (np.ndarray): 形状为 (H, W, 3) 的图像颜色通道。
+        samples (np.ndarray): 形状为 (K, 3) 的背景颜色样本。
+
+    Returns:
+        np.ndarray: 形状为 (H*W,) 的int32平方距离。
+    """
+    # 先转为有符号整数，避免uint8相减回绕；3*255^2 在int32范围内
+    flat = np.asarray(rgb, dtype=np.int32).reshape(-1, 3)
+    min_sq = np.full(flat.shape[0], np.iinfo(np.int32).max, dtype=np.int32)
+    diff = np.empty_like(flat)
+    # 角点等位置的样本经常相同，去重后减少遍历次数
+    for s in np.unique(np.asarray(samples, dtype=np.int32), axis=0):
+        np.subtract(flat, s, out=diff)
+        np.minimum(min_sq, np.einsum('ij,ij->i', diff, diff), out=min_sq)
+    return min_sq
+
+@functools.lru_cache(maxsize=16)
+def rect_kernel(k):
+    """返回 k×k 的矩形结构元素（按尺寸缓存，调用方不得修改返回的数组）。"""
+    return cv2.getStructuringElement(cv2.MORPH_RECT, (k, k))
+
+if njit is not None:
+    @njit(parallel=True, cache=True)
+    def _gen_mask_kernel(img, bg, thr2, out):
+        """逐像素计算到最近背景样本的平方距离并直接写出阈值化蒙版（按行并行）。
+
+        Args:
+            img (np.ndarray): 形状为 (H, W, C) 的uint8图像，只读取前3个通道。
+            bg (np.ndarray): 形状为 (K, 3) 的int32背景样本。
+            thr2 (int): 色差阈值的平方。
+            out (np.ndarray): 形状为 (H, W) 的uint8输出蒙版。
+        """
+        h, w = out.shape
+        for y in prange(h):
+            for x in range(w):
+                r = np.int32(img[y, x, 0])
+                g = np.int32(img[y, x, 1])
+                b = np.int32(img[y, x, 2])
+                best = np.int32(0x7FFFFFFF)
+                for k in range(bg.shape[0]):
+                    dr = r - bg[k, 0]
+                    dg = g - bg[k, 1]
+                    db = b - bg[k, 2]
+                    d = dr * dr + dg * dg + db * db
+                    if d < best:
+                        best = d
+                out[y, x] = 255 if best > thr2 else 0
+else:
+    _gen_mask_kernel = None
+
+# numba的workqueue线程层不支持多个线程同时进入并行内核（会直接中止进程），
+# 蒙版任务在线程池中执行，调用内核时串行化
+_GEN_MASK_KERNEL_LOCK = threading.Lock()
 
 class MaskProcessor:
     """处理蒙版生成和ROI提取的核心逻辑。
@@ -76,31 +169,47 @@ class MaskProcessor:
             img_np[h//2,0,:3], img_np[0,w//2,:3], img_np[h//2,w//2,:3]
         ])
 
-    def gen_mask(self, img_np):
+    def gen_mask(self, img_np, kernel_scale=1.0):
         """根据背景颜色采样生成前景蒙版。
 
         使用颜色距离和形态学操作（闭运算和开运算）来生成和优化蒙版。
 
         Args:
             img_np (np.ndarray): 输入图像 (Numpy数组, RGBA格式)。
+            kernel_scale (float, optional): 形态学核大小的缩放系数，在缩小的代理图上
+                生成蒙版时传入代理图的缩放比例. Defaults to 1.0.
 
         Returns:
             np.ndarray: 生成的前景蒙版 (灰度图, 0或255)。
         """
         h, w = img_np.shape[0], img_np.shape[1]
         bg_samples = self.get_bg_samples(img_np)
-        flat_img = img_np[...,:3].reshape(-1,3) # 忽略Alpha通道进行颜色比较
-        dist = np.min(np.linalg.norm(flat_img[:,None,:] - bg_samples[None,:,:], axis=2), axis=1)
-        mask_fg = (dist > self.color_thresh).astype(np.uint8).reshape(h, w) * 255
-        kernel = np.ones((int(self.kernel_size),int(self.kernel_size)), np.uint8)
-        mask_fg = cv2.morphologyEx(mask_fg, cv2.MORPH_CLOSE, kernel, iterations=self.close_iter)
-        mask_fg = cv2.morphologyEx(mask_fg, cv2.MORPH_OPEN, kernel, iterations=self.open_iter)
+        # 忽略Alpha通道进行颜色比较；与阈值的平方比较，无需开方
+        thr2 = self.color_thresh * self.color_thresh
+        if _gen_mask_kernel is not None and img_np.dtype == np.uint8:
+            # 安装了numba时一次遍历完成求差、平方、取最小和阈值化，直接读原图不复制
+            mask_fg = np.empty((h, w), dtype=np.uint8)
+            bg = np.unique(bg_samples.astype(np.int32), axis=0)
+            with _GEN_MASK_KERNEL_LOCK:
+                _gen_mask_kernel(img_np, bg, int(thr2), mask_fg)
+        else:
+            min_sq = _min_sq_distance(img_np[..., :3], bg_samples)
+            mask_fg = (min_sq > thr2).view(np.uint8).reshape(h, w) * np.uint8(255)
+        k = max(1, int(round(self.kernel_size * kernel_scale)))
+        kernel = rect_kernel(k)
+        # 闭运算(n次)+开运算(m次) = 膨胀n次 -> 腐蚀n+m次 -> 膨胀m次；
+        # 中间相邻的两次腐蚀合并为一次调用，三步都在同一缓冲区上原地进行
+        cv2.dilate(mask_fg, kernel, dst=mask_fg, iterations=self.close_iter)
+        cv2.erode(mask_fg, kernel, dst=mask_fg, iterations=self.close_iter + self.open_iter)
+        cv2.dilate(mask_fg, kernel, dst=mask_fg, iterations=self.open_iter)
         return mask_fg
 
     def extract_rois(self, img_np, mask_fg):
         """从前景蒙版中提取感兴趣区域（ROIs）。
 
-        查找轮廓，根据面积过滤，并根据设置的输出尺寸自动居中。
+        一次 connectedComponentsWithStats 调用得到所有连通域的外接框和像素面积，
+        先按面积范围过滤，再按面积降序取前 max_extract 个，根据设置的输出尺寸自动居中。
+        每帧的蒙版只包含该连通域本身，不含扩展区域内相邻的其他连通域。
 
         Args:
             img_np (np.ndarray): 原始图像 (Numpy数组, RGBA格式)。
@@ -109,45 +218,27 @@ class MaskProcessor:
         Returns:
             list[FrameROI]: 提取的FrameROI对象列表。
         """
-        contours, _ = cv2.findContours(mask_fg, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
-        contours = sorted(contours, key=cv2.contourArea, reverse=True)
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(mask_fg, connectivity=8, ltype=cv2.CV_32S)
+        stats = stats[1:] # 第0行是背景
+        areas = stats[:, cv2.CC_STAT_AREA]
+        keep = np.nonzero((areas >= self.min_area) & (areas <= self.max_area))[0]
+        order = keep[np.argsort(-areas[keep], kind='stable')][:self.max_extract]
+        boxes = stats[order]
+        placement = _place_rois(boxes[:, :4], self.pad, img_np.shape[1], img_np.shape[0],
+                                self.out_width, self.out_height)
         rois = []
-        idx = 1
-        for cnt in contours[:self.max_extract]:
-            area = cv2.contourArea(cnt)
-            if area < self.min_area or area > self.max_area:
-                continue
-            x, y, w2, h2 = cv2.boundingRect(cnt)
-            pad = self.pad
-            x = max(0, x - pad)
-            y = max(0, y - pad)
-            w2 = min(img_np.shape[1] - x, w2 + 2 * pad)
-            h2 = min(img_np.shape[0] - y, h2 + 2 * pad)
-            
-            # 提取带透明通道的ROI图像
-            roi_img_with_alpha = img_np[y:y+h2, x:x+w2].copy()
-            
-            # 提取对应的蒙版区域
-            roi_mask = mask_fg[y:y+h2, x:x+w2]
-            
-            # 将蒙版应用到ROI图像的Alpha通道
-            roi_img_with_alpha[...,3] = roi_mask 
-            
-            # 自动居中到指定画布
-            out_h, out_w = self.out_height, self.out_width
-            canvas = np.zeros((out_h, out_w, 4), dtype=np.uint8)
-            ry, rx = roi_img_with_alpha.shape[0], roi_img_with_alpha.shape[1]
-            sy = max((out_h-ry)//2, 0)
-            sx = max((out_w-rx)//2, 0)
-            ey = min(sy+ry, out_h)
-            ex = min(sx+rx, out_w)
-            cy = min(ry, out_h-sy)
-            cx = min(rx, out_w-sx)
-            canvas[sy:sy+cy, sx:sx+cx] = roi_img_with_alpha[:cy, :cx]
-            
+        for idx, ((x, y, w2, h2, sy, sx, cy, cx), area, label) in enumerate(
+                zip(placement.tolist(), boxes[:, cv2.CC_STAT_AREA].tolist(), (order + 1).tolist()), start=1):
+            # 按标签生成该连通域自己的蒙版（stats去掉了背景行，标签号为行号+1）
+            roi_mask = (labels[y:y+h2, x:x+w2] == label).view(np.uint8) * np.uint8(255)
+
+            # 自动居中到指定画布：颜色通道直接从原图拷入画布，Alpha通道取自蒙版
+            canvas = np.zeros((self.out_height, self.out_width, 4), dtype=np.uint8)
+            canvas[sy:sy+cy, sx:sx+cx, :3] = img_np[y:y+cy, x:x+cx, :3]
+            canvas[sy:sy+cy, sx:sx+cx, 3] = roi_mask[:cy, :cx]
+
             # 创建FrameROI对象，注意传递的是居中后的canvas和原始未缩放的roi_mask
             rois.append(FrameROI(canvas, roi_mask, x, y, w2, h2, area, idx))
-            idx += 1
         return rois
 
     def get_params(self):
@@ -192,53 +283,77 @@ PLACEHOLDER_MAP = {
     '[备注]': 'note'
 }
 
-def render_filename(template, roi):
-    """根据模板和ROI数据渲染文件名。
+# Regex to find placeholders like [Name] or [Name:FormatSpec]
+_PLACEHOLDER_PATTERN = re.compile(r'\[([^\]:]+)(?::([^\]]+))?\]')
+_INVALID_FILENAME_CHARS = re.compile(r'[\\/:*?"<>|]')
 
-    支持友好占位符如 '[索引]', '[标签]', '[X:03d]', '[面积:.1f]'。
+@functools.lru_cache(maxsize=64)
+def compile_template(template):
+    """解析命名模板，返回可反复用于 render_filename 的编译结果。
+
+    模板只在首次出现时做正则扫描，之后渲染只需逐段取值和格式化。
 
     Args:
         template (str): 包含占位符的命名模板。
-        roi (FrameROI): FrameROI对象。
 
     Returns:
-        str: 渲染后的文件名。
+        tuple: 由字面量字符串和 (占位符, 属性名, 格式说明) 元组组成的片段序列。
     """
-    rendered_name = template
-    # Regex to find placeholders like [Name] or [Name:FormatSpec]
-    placeholder_pattern = re.compile(r'\[([^\]:]+)(?::([^\]]+))?\]')
-
-    for match in placeholder_pattern.finditer(template):
+    parts = []
+    pos = 0
+    for match in _PLACEHOLDER_PATTERN.finditer(template):
         placeholder = match.group(0) # e.g., '[索引:03d]'
         name_key = match.group(1)   # e.g., '索引'
         format_spec = match.group(2) # e.g., '03d' or None
-
+        if match.start() > pos:
+            parts.append(template[pos:match.start()])
+        pos = match.end()
         # Find the attribute name using the friendly key
-        attr_name = PLACEHOLDER_MAP.get(f'[{name_key}]') 
-        
-        if attr_name and hasattr(roi, attr_name):
-            value = getattr(roi, attr_name)
-            try:
-                # Apply format specifier if provided
-                if format_spec:
-                    formatted_value = f"{value:{format_spec}}"
-                else:
-                    # Default string conversion if no format spec
-                    formatted_value = str(value)
-                
-                # Replace the placeholder in the rendered string
-                rendered_name = rendered_name.replace(placeholder, formatted_value)
-            except (ValueError, TypeError, Exception) as fmt_err:
-                logging.warning(f"格式化占位符 '{placeholder}' 出错 (值: {value}, 格式: '{format_spec}'): {fmt_err}. 使用原始值替代。")
-                # Fallback to string representation if format spec is invalid
-                rendered_name = rendered_name.replace(placeholder, str(value))
+        attr_name = PLACEHOLDER_MAP.get(f'[{name_key}]')
+        if attr_name:
+            parts.append((placeholder, attr_name, format_spec))
         else:
             logging.warning(f"在模板中发现未知或无效的占位符: {placeholder}")
+            parts.append(placeholder)
+    if pos < len(template):
+        parts.append(template[pos:])
+    return tuple(parts)
+
+def render_filename(template, roi):
+    """根据模板和ROI数据渲染文件名。
+
+    支持友好占位符如 '[索引]', '[标签]', '[X:03d]', '[面积:.1f]'。
+
+    Args:
+        template (str | tuple): 包含占位符的命名模板，或 compile_template 的编译结果。
+        roi (FrameROI): FrameROI对象。
+
+    Returns:
+        str: 渲染后的文件名。
+    """
+    parts = compile_template(template) if isinstance(template, str) else template
+    pieces = []
+    for part in parts:
+        if isinstance(part, str):
+            pieces.append(part)
+            continue
+        placeholder, attr_name, format_spec = part
+        if not hasattr(roi, attr_name):
+            logging.warning(f"在模板中发现未知或无效的占位符: {placeholder}")
+            pieces.append(placeholder)
+            continue
+        value = getattr(roi, attr_name)
+        try:
+            # Apply format specifier if provided, default string conversion otherwise
+            pieces.append(f"{value:{format_spec}}" if format_spec else str(value))
+        except (ValueError, TypeError, Exception) as fmt_err:
+            logging.warning(f"格式化占位符 '{placeholder}' 出错 (值: {value}, 格式: '{format_spec}'): {fmt_err}. 使用原始值替代。")
+            # Fallback to string representation if format spec is invalid
+            pieces.append(str(value))
 
     # Basic filename sanitization (remove characters not suitable for filenames)
     # This is a simple example, might need refinement based on OS
-    invalid_chars = r'[\\/:*?"<>|]'
-    rendered_name = re.sub(invalid_chars, '_', rendered_name)
+    rendered_name = _INVALID_FILENAME_CHARS.sub('_', ''.join(pieces))
     
     # Ensure it ends with .png if no extension is specified
     if '.' not in os.path.splitext(rendered_name)[1]:
@@ -290,3 +405,55 @@ def filter_rois(rois, area_range=None, aspect_range=None, x_range=None, y_range=
             continue
         result.append(r)
     return result
+
+# ROI属性表的列顺序，供向量化筛选和排序使用
+ROI_TABLE_COLUMNS = ("x", "y", "w", "h", "area", "aspect_ratio", "idx")
+_COL = {name: i for i, name in enumerate(ROI_TABLE_COLUMNS)}
+
+def build_roi_table(rois):
+    """将FrameROI列表转换为按列存储的属性表，提取后构建一次，供筛选和排序反复使用。
+
+    Args:
+        rois (list[FrameROI]): FrameROI对象列表。
+
+    Returns:
+        np.ndarray: 形状为 (N, len(ROI_TABLE_COLUMNS)) 的float64数组。
+    """
+    table = np.array([[getattr(r, c) for c in ROI_TABLE_COLUMNS] for r in rois], dtype=np.float64)
+    return table.reshape(len(rois), len(ROI_TABLE_COLUMNS))
+
+def select_rois(table, area_range=None, aspect_range=None, by="area", reverse=True, sort_cache=None):
+    """在ROI属性表上向量化地筛选和排序，结果与 filter_rois + sort_rois 一致。
+
+    传入 sort_cache 时，整表按 (排序属性, 是否降序) 的排序结果会被缓存；
+    之后只调整筛选范围时不再排序，只需按筛选结果从缓存的顺序中挑选。
+
+    Args:
+        table (np.ndarray): build_roi_table 生成的属性表。
+        area_range (tuple, optional): 面积范围 (min, max). Defaults to None.
+        aspect_range (tuple, optional): 长宽比范围 (min, max). Defaults to None.
+        by (str, optional): 排序依据的属性名称. Defaults to "area".
+        reverse (bool, optional): 是否降序排序. Defaults to True.
+        sort_cache (dict, optional): 同一张属性表的排序结果缓存，属性表变化时需换用新字典. Defaults to None.
+
+    Returns:
+        np.ndarray: 选中的ROI在原列表中的下标，按排序结果排列。
+    """
+    keep = np.ones(len(table), dtype=bool)
+    if area_range:
+        area = table[:, _COL["area"]]
+        keep &= (area >= area_range[0]) & (area <= area_range[1])
+    if aspect_range:
+        aspect = table[:, _COL["aspect_ratio"]]
+        keep &= (aspect >= aspect_range[0]) & (aspect <= aspect_range[1])
+    if by == "idx": # 默认按提取顺序（idx升序）
+        reverse = False
+    order = None if sort_cache is None else sort_cache.get((by, reverse))
+    if order is None:
+        keys = table[:, _COL[by]]
+        # 取负后稳定排序，相等元素保持原顺序，与 sorted(reverse=True) 行为一致
+        order = np.argsort(-keys if reverse else keys, kind='stable')
+        if sort_cache is not None:
+            sort_cache[(by, reverse)] = order
+    # 稳定排序后再筛选与先筛选再排序的结果相同
+    return order[keep[order]]
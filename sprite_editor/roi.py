@@ -48,6 +48,7 @@ class FrameROI:
             tag (str, optional): 标签. Defaults to "".
             note (str, optional): 备注. Defaults to "".
         """
+        assert mask.shape[:2] == (h, w), "mask shape must match the ROI size"
         self.img = img
         self.mask = mask
         self.x = x
@@ -63,6 +64,22 @@ class FrameROI:
         self.mask_edit_history = [mask.copy()]
         self.mask_edit_idx = 0
         
+    def apply_mask_alpha(self, mask):
+        """将蒙版写入帧图像的Alpha通道。
+
+        帧图像是居中后的输出画布，蒙版按与提取时相同的居中位置直接拷贝到
+        对应区域，不做缩放。
+
+        Args:
+            mask (np.ndarray): 与ROI尺寸 (h, w) 相同的蒙版。
+        """
+        out_h, out_w = self.img.shape[:2]
+        sy = max((out_h - self.h) // 2, 0)
+        sx = max((out_w - self.w) // 2, 0)
+        cy = min(self.h, out_h - sy)
+        cx = min(self.w, out_w - sx)
+        np.copyto(self.img[sy:sy+cy, sx:sx+cx, 3], mask[:cy, :cx])
+
     def add_mask_to_history(self, mask):
         """添加新的mask到历史记录"""
         if self.mask_edit_idx < len(self.mask_edit_history) - 1:
@@ -12,14 +12,113 @@ Changed history:
 """
 import numpy as np
 import cv2
-from PIL import Image, ImageQt
-from PyQt6 import QtWidgets, QtGui, QtCore
+from PyQt6 import QtWidgets, QtGui, QtCore, sip
 from PyQt6.QtCore import Qt, QSize
 from PyQt6.QtGui import QIcon, QAction, QCursor, QPixmap, QPainter, QPen, QColor
 import logging
 
 from .roi import FrameROI
 from .constants import DEFAULT_BRUSH_SIZE
+from .mask_processor import rect_kernel
+
+# QIcon 缓存，同一图标只从资源系统解码一次，供主窗口和所有对话框共享
+_ICON_CACHE = {}
+
+def cached_icon(path):
+    """获取缓存的QIcon，首次请求时创建。
+
+    Args:
+        path (str): 图标资源路径，如 ":/icons/undo.png"。
+    Returns:
+        QIcon: 图标对象。
+    """
+    icon = _ICON_CACHE.get(path)
+    if icon is None:
+        icon = _ICON_CACHE[path] = QIcon(path)
+    return icon
+
+# numpy通道数 -> QImage像素格式
+_QIMAGE_FORMATS = {
+    1: QtGui.QImage.Format.Format_Grayscale8,
+    3: QtGui.QImage.Format.Format_RGB888,
+    4: QtGui.QImage.Format.Format_RGBA8888,
+}
+
+def ndarray_to_qimage(arr):
+    """将uint8的灰度/RGB/RGBA数组包装为共享内存的QImage，不经过PIL编码。
+
+    返回的QImage直接引用数组的缓冲区（数组引用挂在返回的QImage对象上）。
+    每行像素连续的视图（如大图中切出的ROI）按原行跨度直接引用，不复制。
+    QImage被隐式共享到Qt内部（如跨线程传递）后仍需要像素时，调用 QImage.copy()
+    或 QPixmap.fromImage() 得到独立副本。
+
+    非uint8输入（如经过浮点/有符号运算的中间结果）先在numpy中一次性截断到0~255再转换，
+    避免直接转换时的数值回绕；布尔蒙版转换为0/255。
+
+    Args:
+        arr (np.ndarray): 形状为 (H, W)、(H, W, 1)、(H, W, 3) 或 (H, W, 4) 的图像数组。
+    Returns:
+        QtGui.QImage: 共享数组内存的图像。
+    Raises:
+        ValueError: 数组维度或通道数不受支持。
+    """
+    if arr.dtype == np.bool_:
+        arr = arr.view(np.uint8) * np.uint8(255)
+    elif arr.dtype != np.uint8:
+        arr = np.clip(arr, 0, 255).astype(np.uint8)
+    channels = 1 if arr.ndim == 2 else arr.shape[-1]
+    if arr.ndim not in (2, 3) or channels not in _QIMAGE_FORMATS:
+        raise ValueError(f"Unsupported image array shape: {arr.shape}")
+    h, w = arr.shape[:2]
+    if arr.flags.c_contiguous:
+        data = arr.data
+    elif arr.strides[0] > 0 and arr.strides[1] == channels and (arr.ndim == 2 or arr.strides[2] == 1):
+        # 行内连续、行间有间隔的切片视图：buffer协议不接受非连续内存，直接传地址和行跨度
+        data = sip.voidptr(arr.ctypes.data)
+    else:
+        arr = np.ascontiguousarray(arr)
+        data = arr.data
+    qimg = QtGui.QImage(data, w, h, arr.strides[0], _QIMAGE_FORMATS[channels])
+    # 数组可能是本函数内新建的连续副本，挂在QImage上防止缓冲区被提前回收
+    qimg._ndarray = arr
+    return qimg
+
+def ndarray_to_qpixmap(arr):
+    """将uint8图像数组直接转换为QPixmap（像素数据会被复制，无需保持数组存活）。"""
+    return QtGui.QPixmap.fromImage(ndarray_to_qimage(arr))
+
+THUMB_SIZE = 80 # 缩略图最大边长
+
+def _thumbnail_batch(imgs, size=THUMB_SIZE):
+    """将一组图像等比缩放到 size 以内，结果写入一块预分配的连续内存。
+
+    ROI画布通常尺寸相同，此时每帧直接作为 cv2.resize 的 dst 写入，不产生逐帧的临时数组。
+
+    Args:
+        imgs (list[np.ndarray]): 通道数相同的uint8图像列表。
+        size (int, optional): 缩略图最大边长. Defaults to THUMB_SIZE.
+    Returns:
+        list[np.ndarray]: 每帧缩略图（批量缓冲区上的视图）。
+    """
+    if not imgs:
+        return []
+    dims = []
+    for img in imgs:
+        h, w = img.shape[:2]
+        scale = size / max(h, w, 1)
+        dims.append((max(1, round(h * scale)), max(1, round(w * scale))))
+    batch_h = max(th for th, _ in dims)
+    batch_w = max(tw for _, tw in dims)
+    batch = np.empty((len(imgs), batch_h, batch_w) + imgs[0].shape[2:], dtype=np.uint8)
+    thumbs = []
+    for i, (img, (th, tw)) in enumerate(zip(imgs, dims)):
+        interp = cv2.INTER_AREA if th < img.shape[0] else cv2.INTER_LINEAR
+        if (th, tw) == (batch_h, batch_w):
+            cv2.resize(img, (tw, th), dst=batch[i], interpolation=interp)
+        else:
+            batch[i, :th, :tw] = cv2.resize(img, (tw, th), interpolation=interp)
+        thumbs.append(batch[i, :th, :tw])
+    return thumbs
 
 class ParamHelpLabel(QtWidgets.QLabel):
     """带悬浮帮助提示的QLabel。
@@ -84,6 +183,9 @@ class ThumbListWidget(QtWidgets.QScrollArea):
         self.current_idx = -1 # 当前选中的单个帧索引
         self.selected_indices = set() # 当前选中的所有帧索引集合
         self.thumb_labels = [] # 存储QLabel控件
+        # 已生成的缩略图：id(图像) -> (图像, QPixmap)；保存图像引用保证id不被复用。
+        # 排序/筛选变化只是重新排列同一批图像，直接复用已生成的缩略图
+        self._pixmap_cache = {}
 
     def set_thumbs(self, imgs):
         """设置并显示缩略图列表。
@@ -97,22 +199,31 @@ class ThumbListWidget(QtWidgets.QScrollArea):
         self.clear_thumbs()
         self.thumbs = imgs
 
+        # 只为尚未缓存的图像生成缩略图，在numpy中一次性批量缩放
+        missing = [img for img in self.thumbs if id(img) not in self._pixmap_cache]
+        try:
+            small_imgs = _thumbnail_batch(missing)
+        except Exception as e:
+            logging.error(f"Error building thumbnail batch: {e}")
+            small_imgs = []
+        for img, small in zip(missing, small_imgs):
+            try:
+                self._pixmap_cache[id(img)] = (img, ndarray_to_qpixmap(small))
+            except Exception as e:
+                logging.error(f"Error converting thumbnail: {e}")
+
         # 为每个图像创建并添加QLabel缩略图
         for i, img in enumerate(self.thumbs):
             label = QtWidgets.QLabel()
             label.setFixedSize(90, 90)
             label.setStyleSheet("background:#fff;border-radius:6px;padding:5px;")
 
-            # 转换为QPixmap并缩放
-            try:
-                qimg = ImageQt.ImageQt(Image.fromarray(img))
-                thumb = QtGui.QPixmap.fromImage(qimg)
-                thumb = thumb.scaled(80, 80, Qt.AspectRatioMode.KeepAspectRatio,
-                                    Qt.TransformationMode.SmoothTransformation)
-                label.setPixmap(thumb)
-            except Exception as e:
+            entry = self._pixmap_cache.get(id(img))
+            if entry is not None:
+                label.setPixmap(entry[1])
+            else:
                 # 处理图像转换或缩放错误
-                logging.error(f"Error creating thumbnail for index {i}: {e}")
+                logging.error(f"Error creating thumbnail for index {i}")
                 label.setText("错误") # 显示错误提示
 
             label.setAlignment(Qt.AlignmentFlag.AlignCenter)
@@ -128,6 +239,22 @@ class ThumbListWidget(QtWidgets.QScrollArea):
             self.selection_changed.emit(self.selected_indices)
             self.update_selection_visuals()
 
+    def update_thumb(self, idx, img):
+        """重新生成单个缩略图（如蒙版编辑后）。
+
+        Args:
+            idx (int): 缩略图索引。
+            img (np.ndarray): 新的帧图像数据(RGBA)。
+        """
+        pixmap = ndarray_to_qpixmap(_thumbnail_batch([img])[0])
+        self._pixmap_cache[id(img)] = (img, pixmap)
+        self.thumb_labels[idx].setPixmap(pixmap)
+        self.update_selection_visuals()
+
+    def clear_pixmap_cache(self):
+        """丢弃已生成的缩略图缓存（重新提取帧后调用，释放旧帧图像）。"""
+        self._pixmap_cache = {}
+
     def clear_thumbs(self):
         """清空所有缩略图和内部状态。"""
         self.thumbs = []
@@ -272,6 +399,105 @@ class ThumbListWidget(QtWidgets.QScrollArea):
         self.setCursor(QCursor(Qt.CursorShape.ArrowCursor))
         super().leaveEvent(event)
 
+class FramePreview(QtWidgets.QWidget):
+    """动画预览的帧显示控件。
+
+    在paintEvent中把当前帧直接居中绘制到控件上。与QLabel.setPixmap不同，
+    切换帧不会触发sizeHint重算和布局更新，只请求一次重绘。
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._frame = None
+
+    def set_frame(self, pixmap):
+        """设置当前显示的帧并请求重绘。
+
+        Args:
+            pixmap (QPixmap): 已缩放到控件尺寸以内的帧图像。
+        """
+        self._frame = pixmap
+        self.update()
+
+    def paintEvent(self, event):
+        """将当前帧居中绘制。"""
+        if self._frame is None:
+            return
+        painter = QPainter(self)
+        x = (self.width() - self._frame.width()) // 2
+        y = (self.height() - self._frame.height()) // 2
+        painter.drawPixmap(x, y, self._frame)
+        painter.end()
+
+def _to_bgr(img):
+    """将RGB/RGBA图像转换为OpenCV分割算法所需的BGR格式。"""
+    code = cv2.COLOR_RGBA2BGR if img.shape[2] == 4 else cv2.COLOR_RGB2BGR
+    return cv2.cvtColor(img, code)
+
+def to_gray(img):
+    """将RGB/RGBA图像转换为灰度图（忽略Alpha通道）。
+
+    RGBA输入直接使用COLOR_RGBA2GRAY，避免先切片出非连续的RGB视图再由OpenCV复制。
+    """
+    code = cv2.COLOR_RGBA2GRAY if img.shape[2] == 4 else cv2.COLOR_RGB2GRAY
+    return cv2.cvtColor(img, code)
+
+def _grabcut_segment(img, gc_mask, rect, bgd_model, fgd_model, iter_count, mode):
+    """执行 GrabCut 并返回更新后的内部掩码和模型（可在工作线程中调用）。
+
+    Args:
+        img (np.ndarray): RGBA或RGB图像。
+        gc_mask (np.ndarray): GrabCut内部掩码 (0-3)，原地更新。
+        rect (tuple | None): 初始化矩形 (x, y, w, h)，GC_EVAL 时为None。
+        bgd_model (np.ndarray): 背景模型。
+        fgd_model (np.ndarray): 前景模型。
+        iter_count (int): 迭代次数。
+        mode (int): cv2.GC_INIT_WITH_RECT 或 cv2.GC_EVAL。
+
+    Returns:
+        tuple: (gc_mask, bgd_model, fgd_model)
+    """
+    cv2.grabCut(_to_bgr(img), gc_mask, rect, bgd_model, fgd_model, iter_count, mode)
+    return gc_mask, bgd_model, fgd_model
+
+def _watershed_segment(img, markers):
+    """基于标记执行分水岭分割，返回二值蒙版（可在工作线程中调用）。
+
+    Args:
+        img (np.ndarray): RGBA或RGB图像。
+        markers (np.ndarray): 标记图 (int32)，1为前景，2为背景。不会被修改。
+
+    Returns:
+        np.ndarray: 前景为255的二值蒙版。
+    """
+    markers = markers.copy()
+    cv2.watershed(_to_bgr(img), markers)
+    # -1 为边界，1 为前景，其余为背景
+    output_mask = np.zeros(markers.shape[:2], dtype=np.uint8)
+    output_mask[markers == 1] = 255
+    return output_mask
+
+class TaskWorkerSignals(QtCore.QObject):
+    """TaskWorker 的信号载体（QRunnable 本身不能定义信号）。"""
+    finished = QtCore.pyqtSignal(object)
+    failed = QtCore.pyqtSignal(str)
+
+class TaskWorker(QtCore.QRunnable):
+    """在 QThreadPool 中执行耗时函数（分割、帧缩放等），结果通过信号送回GUI线程。"""
+    def __init__(self, fn, *args):
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.signals = TaskWorkerSignals()
+
+    def run(self):
+        try:
+            result = self.fn(*self.args)
+        except Exception as e:
+            logging.exception(f"Error in background worker: {e}")
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.finished.emit(result)
+
 class MaskEditWidget(QtWidgets.QWidget):
     """用于手绘编辑蒙版的可视化控件。
 
@@ -326,6 +552,10 @@ class MaskEditWidget(QtWidgets.QWidget):
         self.watershed_markers = None
         self.watershed_marker_mode = 'fg' # 'fg', 'bg'
 
+        # 后台分割任务状态
+        self._seg_busy = False
+        self._seg_signals = None # 持有信号对象引用，防止任务完成前被回收
+
         # Store parent dialog reference to toggle buttons
         self.parent_dialog = parent_dialog
 
@@ -586,6 +816,9 @@ class MaskEditWidget(QtWidgets.QWidget):
     def mousePressEvent(self, e: QtGui.QMouseEvent):
         """处理鼠标按下事件，开始绘制、平移或框选。"""
         if e.button() == Qt.MouseButton.LeftButton:
+            if self._seg_busy:
+                # 后台分割进行中，忽略编辑操作
+                return
             modifiers = QtWidgets.QApplication.keyboardModifiers()
             if self.mode == 'grabcut_rect':
                 self.drawing_rect = True
@@ -803,8 +1036,33 @@ class MaskEditWidget(QtWidgets.QWidget):
         logging.warning("Could not convert widget rectangle to valid image rectangle.")
         return None
 
+    def _start_seg_worker(self, fn, args, on_finished, on_failed):
+        """将分割函数提交到全局线程池执行。
+
+        Args:
+            fn (callable): 分割函数，只能访问传入的参数。
+            args (tuple): 传给 fn 的参数（应为副本，避免与GUI线程共享可变数据）。
+            on_finished (callable): 成功时在GUI线程调用，参数为 fn 的返回值。
+            on_failed (callable): 失败时在GUI线程调用，参数为错误信息。
+        """
+        worker = TaskWorker(fn, *args)
+        self._seg_signals = worker.signals
+        worker.signals.finished.connect(lambda result: self._on_seg_done(on_finished, result))
+        worker.signals.failed.connect(lambda msg: self._on_seg_done(on_failed, msg))
+        self._seg_busy = True
+        self._cursor_before_seg = self.cursor().shape()
+        self.setCursor(QCursor(Qt.CursorShape.WaitCursor))
+        QtCore.QThreadPool.globalInstance().start(worker)
+
+    def _on_seg_done(self, callback, value):
+        """后台分割结束：恢复交互状态并调用回调。"""
+        self._seg_busy = False
+        self._seg_signals = None
+        self.setCursor(QCursor(self._cursor_before_seg))
+        callback(value)
+
     def _run_grabcut_initial(self):
-        """执行初始 GrabCut 算法并进入细化模式。"""
+        """在后台执行初始 GrabCut 算法，完成后进入细化模式。"""
         if self.grabcut_rect is None or self.base_img is None:
             logging.warning("GrabCut rectangle or base image not available.")
             return
@@ -821,70 +1079,64 @@ class MaskEditWidget(QtWidgets.QWidget):
             self.update()
             return
 
-        try:
-            # Ensure image is BGR for grabCut
-            if self.base_img.shape[2] == 4:
-                img_bgr = cv2.cvtColor(self.base_img[:, :, :3], cv2.COLOR_RGBA2BGR)
-            else:
-                img_bgr = self.base_img[:, :, :3].copy() # Assume RGB, convert to BGR copy
-                img_bgr = cv2.cvtColor(img_bgr, cv2.COLOR_RGB2BGR)
-            
-            # Initialize mask and models for grabCut
-            self.gc_mask = np.zeros(img_bgr.shape[:2], np.uint8)
-            self.gc_bgd_model = np.zeros((1, 65), np.float64)
-            self.gc_fgd_model = np.zeros((1, 65), np.float64)
-            
-            # Run grabCut with rect initialization
-            iter_count = 5 # Initial iterations
-            logging.info(f"Running cv2.grabCut with GC_INIT_WITH_RECT, rect={img_rect}, iters={iter_count}")
-            cv2.grabCut(img_bgr, self.gc_mask, img_rect, self.gc_bgd_model, self.gc_fgd_model, iter_count, cv2.GC_INIT_WITH_RECT)
-            self.gc_initialized = True
-            
-            # Don't convert to binary mask yet, update pixmap for refine mode
-            # self.set_mask(...) REMOVED
-            logging.info("Initial GrabCut finished. Entering refine mode.")
-            self.update_pix_for_grabcut() # Show initial PR_FG/PR_BG results
-            self.set_mode('grabcut_refine') # Enter refine mode
-            # self.set_grabcut_marker_mode('fg') # set_mode already defaults to fg
-
-        except Exception as e:
-            logging.exception(f"Error during initial GrabCut execution: {e}")
-            # Reset state and return to draw mode on error
-            self.finish_grabcut() # Call finish to properly reset everything
-        # Removed finally block here, state handled by set_mode or finish_grabcut
+        # Initialize mask and models for grabCut
+        gc_mask = np.zeros(self.base_img.shape[:2], np.uint8)
+        bgd_model = np.zeros((1, 65), np.float64)
+        fgd_model = np.zeros((1, 65), np.float64)
+        iter_count = 5 # Initial iterations
+        logging.info(f"Running cv2.grabCut with GC_INIT_WITH_RECT, rect={img_rect}, iters={iter_count}")
+        self._start_seg_worker(
+            _grabcut_segment,
+            (self.base_img, gc_mask, img_rect, bgd_model, fgd_model, iter_count, cv2.GC_INIT_WITH_RECT),
+            self._on_grabcut_initial_done,
+            self._on_grabcut_initial_failed)
+
+    def _on_grabcut_initial_done(self, result):
+        """初始 GrabCut 完成：保存状态并进入细化模式。"""
+        if self.mode != 'grabcut_rect':
+            # 等待期间用户已切换到其他模式，丢弃结果
+            logging.info("GrabCut result discarded, mode changed while running.")
+            return
+        self.gc_mask, self.gc_bgd_model, self.gc_fgd_model = result
+        self.gc_initialized = True
+        # Don't convert to binary mask yet, update pixmap for refine mode
+        logging.info("Initial GrabCut finished. Entering refine mode.")
+        self.update_pix_for_grabcut() # Show initial PR_FG/PR_BG results
+        self.set_mode('grabcut_refine') # Enter refine mode
+
+    def _on_grabcut_initial_failed(self, message):
+        """初始 GrabCut 出错：重置状态并返回绘制模式。"""
+        logging.error(f"Error during initial GrabCut execution: {message}")
+        self.finish_grabcut() # Call finish to properly reset everything
 
     def _run_grabcut_refine(self):
-        """执行 GrabCut 细化迭代。"""
+        """在后台执行 GrabCut 细化迭代。"""
         if not self.gc_initialized or self.gc_mask is None or self.base_img is None:
             logging.warning("GrabCut not initialized or mask/image missing for refinement.")
             return
+        if self._seg_busy:
+            logging.info("Segmentation already running, skipping refinement.")
+            return
 
         logging.info("Running GrabCut refinement iteration...")
-        try:
-            # Ensure image is BGR
-            if self.base_img.shape[2] == 4:
-                img_bgr = cv2.cvtColor(self.base_img[:, :, :3], cv2.COLOR_RGBA2BGR)
-            else:
-                img_bgr = cv2.cvtColor(self.base_img[:, :, :3].copy(), cv2.COLOR_RGB2BGR)
-                
-            # Run grabCut evaluation using the current gc_mask with user scribbles
-            iter_count = 1 # Usually 1 iteration is enough for refinement
-            cv2.grabCut(img_bgr, self.gc_mask, None, self.gc_bgd_model, self.gc_fgd_model, iter_count, cv2.GC_EVAL)
-            
-            # Update the visual representation based on the new gc_mask
-            self.update_pix_for_grabcut()
-            logging.info("GrabCut refinement iteration finished.")
-            
-            # Generate the temporary binary mask for external use (like history preview maybe?)
-            # output_mask = np.where((self.gc_mask == cv2.GC_FGD) | (self.gc_mask == cv2.GC_PR_FGD), 255, 0).astype('uint8')
-            # self.mask = output_mask # Don't update self.mask until finish_grabcut
-            # Don't push to history on each refine step
-            # self.mask_edited.emit(self.mask)
-
-        except Exception as e:
-            logging.exception(f"Error during GrabCut refinement: {e}")
-            # Maybe reset to state before this refine step?
-            # Or just let user try again or finish.
+        # Run grabCut evaluation using the current gc_mask with user scribbles
+        iter_count = 1 # Usually 1 iteration is enough for refinement
+        self._start_seg_worker(
+            _grabcut_segment,
+            (self.base_img, self.gc_mask.copy(), None, self.gc_bgd_model.copy(), self.gc_fgd_model.copy(),
+             iter_count, cv2.GC_EVAL),
+            self._on_grabcut_refine_done,
+            lambda message: logging.error(f"Error during GrabCut refinement: {message}"))
+
+    def _on_grabcut_refine_done(self, result):
+        """GrabCut 细化完成：更新内部掩码和可视化。"""
+        if not self.gc_initialized:
+            # 等待期间会话已结束（撤销/重置等），丢弃结果
+            return
+        self.gc_mask, self.gc_bgd_model, self.gc_fgd_model = result
+        # Update the visual representation based on the new gc_mask
+        self.update_pix_for_grabcut()
+        logging.info("GrabCut refinement iteration finished.")
 
     def draw_point(self, point):
         """在mask上绘制一个点
@@ -956,8 +1208,7 @@ class MaskEditWidget(QtWidgets.QWidget):
         overlay_with_effect = overlay.copy()
         overlay_with_effect[mask_bg_bool] = [120, 120, 120, 128]
         try:
-            qimg = ImageQt.ImageQt(Image.fromarray(overlay_with_effect))
-            pixmap = QPixmap.fromImage(qimg)
+            pixmap = ndarray_to_qpixmap(overlay_with_effect)
             # 缩放和平移 - 统一处理方式，不再区分是否有缩放/平移
             transform = QtGui.QTransform()
             transform.scale(self.zoom_factor, self.zoom_factor)
@@ -1009,8 +1260,7 @@ class MaskEditWidget(QtWidgets.QWidget):
             viz[pr_fgd_mask] = cv2.addWeighted(overlay[pr_fgd_mask], 0.7, blue_overlay[pr_fgd_mask], 0.3, 0)
 
         try:
-            qimg = ImageQt.ImageQt(Image.fromarray(viz))
-            pixmap = QPixmap.fromImage(qimg)
+            pixmap = ndarray_to_qpixmap(viz)
             # 统一处理方式，不再区分是否有缩放/平移
             transform = QtGui.QTransform()
             transform.scale(self.zoom_factor, self.zoom_factor)
@@ -1124,7 +1374,7 @@ class MaskEditWidget(QtWidgets.QWidget):
 
     def edge_detect_canny(self, thresh1=50, thresh2=150, 
                           dilate_k=3, dilate_iter=1, 
-                          close_k=3, close_iter=3):
+                          close_k=3, close_iter=3, approx_scale=1, gray=None, gpu_gray=None):
         """
         使用 Canny 边缘检测和形态学操作生成蒙版 (参数化)。
         
@@ -1135,6 +1385,9 @@ class MaskEditWidget(QtWidgets.QWidget):
             dilate_iter (int): 膨胀操作的迭代次数。
             close_k (int): 闭运算操作的核大小。
             close_iter (int): 闭运算操作的迭代次数。
+            approx_scale (int, optional): 大于1时在按此步长缩小的网格上近似执行闭运算. Defaults to 1.
+            gray (np.ndarray, optional): 预先计算的灰度图，提供时跳过颜色转换. Defaults to None.
+            gpu_gray (cv2.UMat, optional): 灰度图的UMat，提供时模糊/Canny/膨胀经OpenCL执行. Defaults to None.
         """
         if self.base_img is None:
             logging.warning("Cannot run edge detection, base image is None.")
@@ -1143,32 +1396,69 @@ class MaskEditWidget(QtWidgets.QWidget):
         logging.info(f"Running edge_detect_canny: t1={thresh1}, t2={thresh2}, dk={dilate_k}, di={dilate_iter}, ck={close_k}, ci={close_iter}")
             
         try:
-            if self.base_img.shape[2] == 4:
-                gray = cv2.cvtColor(self.base_img[:,:,:3], cv2.COLOR_RGB2GRAY)
-            else:
-                gray = cv2.cvtColor(self.base_img, cv2.COLOR_RGB2GRAY)
+            if gray is None:
+                gray = self._gray_image()
+            src = gray if gpu_gray is None else gpu_gray
             
-            blurred = cv2.GaussianBlur(gray, (5, 5), 0)
+            blurred = cv2.GaussianBlur(src, (5, 5), 0)
             edges = cv2.Canny(blurred, thresh1, thresh2)
             
             if dilate_iter > 0 and dilate_k > 0:
-                dilate_kernel = np.ones((int(dilate_k), int(dilate_k)), np.uint8)
+                dilate_kernel = rect_kernel(int(dilate_k))
                 edges = cv2.dilate(edges, dilate_kernel, iterations=int(dilate_iter))
+            if isinstance(edges, cv2.UMat):
+                edges = edges.get()
             
             contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
             mask = np.zeros_like(gray)
             cv2.drawContours(mask, contours, -1, 255, -1)
             
             if close_iter > 0 and close_k > 0:
-                close_kernel = np.ones((int(close_k), int(close_k)), np.uint8)
-                mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, close_kernel, iterations=int(close_iter))
+                if approx_scale > 1:
+                    mask = self._approx_close(mask, int(close_k), int(close_iter), int(approx_scale))
+                else:
+                    close_kernel = rect_kernel(int(close_k))
+                    mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, close_kernel, iterations=int(close_iter))
             
             self.set_mask(mask)
         except Exception as e:
             logging.exception(f"Error during Canny edge detection: {e}")
 
+    def _gray_image(self):
+        """将基础图像转换为灰度图（忽略Alpha通道）。"""
+        return to_gray(self.base_img)
+
+    @staticmethod
+    def _approx_close(mask, k, iterations, scale):
+        """在缩小的网格上近似执行闭运算，用于大尺寸蒙版。
+
+        闭运算结果总是包含原蒙版，因此将放大回原尺寸的结果与原蒙版取并集，
+        保留全分辨率下的边缘细节，只由低分辨率结果负责填洞。
+
+        Args:
+            mask (np.ndarray): 二值蒙版。
+            k (int): 原分辨率下的核大小。
+            iterations (int): 迭代次数。
+            scale (int): 缩小步长。
+        Returns:
+            np.ndarray: 闭运算后的蒙版。
+        """
+        h, w = mask.shape[:2]
+        small = cv2.resize(mask, (max(1, w // scale), max(1, h // scale)), interpolation=cv2.INTER_NEAREST)
+        small_k = max(1, k // scale)
+        small = cv2.morphologyEx(small, cv2.MORPH_CLOSE, rect_kernel(small_k), iterations=iterations)
+        closed = cv2.resize(small, (w, h), interpolation=cv2.INTER_NEAREST)
+        return cv2.bitwise_or(mask, closed)
+
     def auto_fix_morph(self, open_k=3, open_iter=1, close_k=3, close_iter=2):
-        """自动修复蒙版 - 参数化的形态学操作。"""
+        """自动修复蒙版 - 参数化的形态学操作。
+
+        Args:
+            open_k (int): 开运算核大小。
+            open_iter (int): 开运算迭代次数。
+            close_k (int): 闭运算核大小。
+            close_iter (int): 闭运算迭代次数。
+        """
         if self.mask is None:
             logging.warning("Cannot run auto fix, mask is None.")
             return
@@ -1176,23 +1466,22 @@ class MaskEditWidget(QtWidgets.QWidget):
         logging.info(f"Running auto_fix_morph: ok={open_k}, oi={open_iter}, ck={close_k}, ci={close_iter}")
         
         try:
-            current_mask = self.mask.copy()
+            # morphologyEx 输出新数组，set_mask 也会复制，这里无需再拷贝
+            current_mask = self.mask
             
             # Open operation (remove noise)
             if open_iter > 0 and open_k > 0:
-                open_kernel = np.ones((int(open_k), int(open_k)), np.uint8)
-                current_mask = cv2.morphologyEx(current_mask, cv2.MORPH_OPEN, open_kernel, iterations=int(open_iter))
+                current_mask = cv2.morphologyEx(current_mask, cv2.MORPH_OPEN, rect_kernel(int(open_k)), iterations=int(open_iter))
             
             # Close operation (fill holes)
             if close_iter > 0 and close_k > 0:
-                close_kernel = np.ones((int(close_k), int(close_k)), np.uint8)
-                current_mask = cv2.morphologyEx(current_mask, cv2.MORPH_CLOSE, close_kernel, iterations=int(close_iter))
+                current_mask = cv2.morphologyEx(current_mask, cv2.MORPH_CLOSE, rect_kernel(int(close_k)), iterations=int(close_iter))
             
             self.set_mask(current_mask)
         except Exception as e:
             logging.exception(f"Error during auto fix morphology: {e}")
 
-    def run_adaptive_threshold(self, adaptive_method=cv2.ADAPTIVE_THRESH_GAUSSIAN_C, block_size=11, C=2):
+    def run_adaptive_threshold(self, adaptive_method=cv2.ADAPTIVE_THRESH_GAUSSIAN_C, block_size=11, C=2, gray=None, gpu_gray=None):
         """
         使用自适应阈值生成蒙版。
         
@@ -1200,6 +1489,8 @@ class MaskEditWidget(QtWidgets.QWidget):
             adaptive_method (int): 自适应阈值方法。
             block_size (int): 块大小。
             C (int): 常数。
+            gray (np.ndarray, optional): 预先计算的灰度图，提供时跳过颜色转换. Defaults to None.
+            gpu_gray (cv2.UMat, optional): 灰度图的UMat，提供时阈值计算经OpenCL执行. Defaults to None.
         """
         if self.base_img is None:
             logging.warning("Cannot run adaptive threshold, base image is None.")
@@ -1208,10 +1499,10 @@ class MaskEditWidget(QtWidgets.QWidget):
         logging.info(f"Running adaptive threshold: method={adaptive_method}, block={block_size}, C={C}")
         
         try:
-            if self.base_img.shape[2] == 4:
-                gray = cv2.cvtColor(self.base_img[:,:,:3], cv2.COLOR_RGB2GRAY)
-            else:
-                gray = cv2.cvtColor(self.base_img, cv2.COLOR_RGB2GRAY)
+            if gpu_gray is not None:
+                gray = gpu_gray
+            elif gray is None:
+                gray = self._gray_image()
                 
             # Apply adaptive threshold
             thresh_mask = cv2.adaptiveThreshold(gray, 255,
@@ -1223,6 +1514,8 @@ class MaskEditWidget(QtWidgets.QWidget):
             # Adaptive threshold typically finds dark objects on light background (object=0, bg=255)
             # We need the opposite (object=255, bg=0)
             final_mask = cv2.bitwise_not(thresh_mask)
+            if isinstance(final_mask, cv2.UMat):
+                final_mask = final_mask.get()
             
             self.set_mask(final_mask)
         except Exception as e:
@@ -1276,10 +1569,7 @@ class MaskEditWidget(QtWidgets.QWidget):
     def clear_mask(self):
         """清除整个蒙版（设置为0），并重置 GrabCut 状态。"""
         if self.mask is not None:
-            # 保存当前状态到历史
-            old_mask = self.mask.copy()
-            
-            # 清除蒙版
+            # 原地清除蒙版（清除前的状态已在历史记录中）
             self.mask.fill(0)
             
             # 更新历史和显示
@@ -1316,6 +1606,9 @@ class MaskEditWidget(QtWidgets.QWidget):
     def run_watershed_segmentation(self):
         """ 基于用户标记执行 Watershed 分割。"""
         logging.info("Running Watershed segmentation...")
+        if self._seg_busy:
+            logging.info("Segmentation already running, ignoring request.")
+            return
         if self.watershed_markers is None or self.base_img is None:
             logging.error("Watershed markers or base image not available for segmentation!")
             if self.watershed_markers is None:
@@ -1334,44 +1627,32 @@ class MaskEditWidget(QtWidgets.QWidget):
             return
 
         logging.info("Starting Watershed algorithm calculation...")
-        
-        try:
-            # Ensure image is BGR for watershed
-            if self.base_img.shape[2] == 4:
-                img_bgr = cv2.cvtColor(self.base_img[:, :, :3], cv2.COLOR_RGBA2BGR)
-            else:
-                img_bgr = cv2.cvtColor(self.base_img[:, :, :3].copy(), cv2.COLOR_RGB2BGR)
-
-            # Create a copy of markers for the algorithm
-            markers_copy = self.watershed_markers.copy()
-            logging.debug(f"Watershed markers shape: {markers_copy.shape}, img_bgr shape: {img_bgr.shape}")
-
-            # Run watershed
-            logging.info("Calling cv2.watershed()...")
-            cv2.watershed(img_bgr, markers_copy)
-            logging.info("cv2.watershed() completed")
-            
-            # Generate binary mask: -1 are boundaries, 1 is FG, others are BG
-            # We want areas marked originally as FG (1) that didn't become boundaries (-1)
-            output_mask = np.zeros_like(self.mask, dtype=np.uint8)
-            output_mask[markers_copy == 1] = 255 # Mark watershed FG regions as 255
-            logging.debug(f"Generated output mask with {np.sum(output_mask > 0)} foreground pixels")
-            # Optional: Treat boundaries as background (might remove thin foreground parts)
-            # output_mask[markers_copy == -1] = 0 
-            
-            # Apply the generated mask
-            logging.info("Setting final watershed segmentation mask")
-            self.set_mask(output_mask)
-            logging.info("Watershed segmentation finished.")
-
-        except Exception as e:
-            logging.exception(f"Error during Watershed execution: {e}")
-            QtWidgets.QMessageBox.critical(self.parent_dialog, "分割出错", f"执行分水岭算法时出错: {e}")
-        finally:
-            # Exit watershed mode regardless of success or failure
-            logging.info("Exiting watershed mode")
-            self.set_mode('draw')
-            self.watershed_markers = None # Clear markers
+        self._start_seg_worker(
+            _watershed_segment,
+            (self.base_img, self.watershed_markers.copy()),
+            self._on_watershed_done,
+            self._on_watershed_failed)
+
+    def _on_watershed_done(self, output_mask):
+        """分水岭分割完成：应用蒙版并退出标记模式。"""
+        logging.debug(f"Generated output mask with {np.sum(output_mask > 0)} foreground pixels")
+        # Apply the generated mask
+        logging.info("Setting final watershed segmentation mask")
+        self.set_mask(output_mask)
+        logging.info("Watershed segmentation finished.")
+        self._exit_watershed_mode()
+
+    def _on_watershed_failed(self, message):
+        """分水岭分割出错：提示用户并退出标记模式。"""
+        logging.error(f"Error during Watershed execution: {message}")
+        QtWidgets.QMessageBox.critical(self.parent_dialog, "分割出错", f"执行分水岭算法时出错: {message}")
+        self._exit_watershed_mode()
+
+    def _exit_watershed_mode(self):
+        """无论成功与否，结束后都退出分水岭模式。"""
+        logging.info("Exiting watershed mode")
+        self.set_mode('draw')
+        self.watershed_markers = None # Clear markers
 
     def update_pix_for_watershed(self):
         """更新显示以可视化 Watershed 标记。"""
@@ -1415,9 +1696,8 @@ class MaskEditWidget(QtWidgets.QWidget):
 
         # Apply standard pixmap update logic (zoom, pan, set pixmap)
         try:
-            logging.debug("Creating QImage from visualization")
-            qimg = ImageQt.ImageQt(Image.fromarray(viz))
-            pixmap = QPixmap.fromImage(qimg)
+            logging.debug("Creating QPixmap from visualization")
+            pixmap = ndarray_to_qpixmap(viz)
             # 统一处理方式，不再区分是否有缩放/平移
             transform = QtGui.QTransform()
             transform.scale(self.zoom_factor, self.zoom_factor)